@@ -7,8 +7,8 @@ import shutil
 from pynput import keyboard as pynput_keyboard
 from PyQt6.QtCore import QThread, pyqtSignal # Make sure QThread and pyqtSignal are imported
 from PyQt6.QtWidgets import QMessageBox # Added for potential error popups
-from utils import APP_DATA_DIR # New: Import APP_DATA_DIR for screenshot saving
 from models import PIL_AVAILABLE, ImageGrab # New: Import PIL_AVAILABLE and ImageGrab for screenshots
+from screenshots import screenshot_settings
 from datetime import datetime # New: Import datetime for timestamping screenshots
 
 # Check if AutoIt is available
@@ -1028,10 +1028,11 @@ class CollectionManager:
         
         # Webhook for returning from merchant run
         if self.app.collection_running: # Only send if macro wasn't stopped
-            self.app.send_webhook(
-                title="🗺️ Returning to Main Path",
-                description=f"Finished merchant run. Returning to '{original_current_path_name}'.",
-                color=0x3498db # A blue color
+            self.app.merchant_webhook_signal.emit(
+                "🗺️ Returning to Main Path",
+                f"Finished merchant run. Returning to '{original_current_path_name}'.",
+                0x3498db, # A blue color
+                None
             )
 
         self.current_path = original_current_path # Restore original path
@@ -1042,7 +1043,7 @@ class CollectionManager:
         if not self.app or not self.collection_worker:
             return
 
-        filepath = None
+        title = f"🛍️ {merchant_name} Purchases"
         status_message = f"🛍️ Items purchased from {merchant_name}."
 
         if hasattr(self.app, 'merchant_shop_area_coords') and self.app.merchant_shop_area_coords and \
@@ -1055,27 +1056,30 @@ class CollectionManager:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 # Sanitize path_id for filename
                 safe_path_id = path_id.replace(" ", "_").replace("/", "_").replace("\\", "_") 
-                filename = f"merchant_{safe_path_id}_{timestamp}.png"
-                # Ensure APP_DATA_DIR is defined (should be imported from utils)
-                filepath = os.path.join(APP_DATA_DIR, filename) 
-                screenshot.save(filepath, "PNG")
-                self.collection_worker.update_status_signal.emit(f"📸 Screenshot for {merchant_name} saved: {filename}")
+                name = f"merchant_{safe_path_id}_{timestamp}"
                 status_message = f"Items purchased from {merchant_name}. See screenshot for details."
+                worker = self.collection_worker
+
+                def on_encoded(encoded, error):
+                    # Runs on the encoder thread, so the merchant run isn't held up by encoding;
+                    # the webhook itself is built on the GUI thread via the signal
+                    if error is not None:
+                        worker.update_status_signal.emit(f"❌ Error encoding screenshot for {merchant_name}: {error}")
+                    else:
+                        worker.update_status_signal.emit(f"📸 Screenshot for {merchant_name} encoded: {encoded.savings_message()}")
+                    self.app.merchant_webhook_signal.emit(title, status_message, 0x58D68D, encoded)
+
+                self.app.screenshot_encoder.submit(screenshot, name, screenshot_settings(self.app.config), on_encoded)
+                return
             except Exception as e:
                 self.collection_worker.update_status_signal.emit(f"❌ Error taking screenshot for {merchant_name}: {e}")
-                filepath = None # Ensure filepath is None if screenshot fails
+                status_message = f"🛍️ Items purchased from {merchant_name}."
         elif not (hasattr(self.app, 'merchant_shop_area_coords') and self.app.merchant_shop_area_coords and len(self.app.merchant_shop_area_coords) == 4):
             self.collection_worker.update_status_signal.emit(f"⚠️ Merchant shop area not calibrated. Skipping screenshot for {merchant_name}.")
         elif not PIL_AVAILABLE:
             self.collection_worker.update_status_signal.emit(f"⚠️ Pillow (PIL) not available. Skipping screenshot for {merchant_name}.")
 
-        self.app.send_webhook(
-            title=f"🛍️ {merchant_name} Purchases",
-            description=status_message,
-            color=0x58D68D, # A greenish color
-            file_path=filepath # Will be None if screenshot failed or wasn't taken
-        )
-        # File deletion is handled by send_webhook if filepath is provided and it's a temp currency/merchant file
+        self.app.merchant_webhook_signal.emit(title, status_message, 0x58D68D, None) # A greenish color
 
     def run_collection_loop(self):
         """Main collection path loop worker function"""
@@ -26,9 +26,15 @@ DEFAULT_CONFIG = {
     "enable_scheduled_merchant_run": False,
     "currency_updates_enabled": False,
     "currency_updates_delay_minutes": 10,
+    "currency_change_threshold": 12,
     "currency_display_area_coords": None,
     "spam_e_for_ticket_path": False,
     "merchant_shop_area_coords": None,
+    "webhook_coalesce_ms": 250,
+    "webhook_routes": [],
+    "screenshot_format": "PNG",
+    "screenshot_quality": 80,
+    "screenshot_max_dimension": 0,
 }
 
 def load_config():
@@ -129,6 +135,18 @@ class Config:
         self.currency_updates_enabled = DEFAULT_CONFIG.get('currency_updates_enabled', False)
         self.currency_updates_delay_minutes = DEFAULT_CONFIG.get('currency_updates_delay_minutes', 60)
         self.currency_display_area_coords = DEFAULT_CONFIG.get('currency_display_area_coords', None)
+        # Grey levels a block of the currency display must change by before a new screenshot is sent (0 = always send)
+        self.currency_change_threshold = DEFAULT_CONFIG.get('currency_change_threshold', 12)
+
+        # How long non-urgent webhook embeds are held so a burst is sent as one message
+        self.webhook_coalesce_ms = DEFAULT_CONFIG.get('webhook_coalesce_ms', 250)
+        # Extra webhooks per event type, e.g. {"events": ["hatch"], "webhooks": ["https://..."]}
+        self.webhook_routes = list(DEFAULT_CONFIG.get('webhook_routes', []))
+
+        # Screenshot uploads: PNG, WEBP or JPEG, quality for the lossy formats, 0 = no downscale
+        self.screenshot_format = DEFAULT_CONFIG.get('screenshot_format', "PNG")
+        self.screenshot_quality = DEFAULT_CONFIG.get('screenshot_quality', 80)
+        self.screenshot_max_dimension = DEFAULT_CONFIG.get('screenshot_max_dimension', 0)
         
         # Determine config file path
         app_data_dir = os.getenv('APPDATA')
@@ -183,6 +201,12 @@ class Config:
                     self.currency_updates_enabled = config.get('currency_updates_enabled', DEFAULT_CONFIG.get('currency_updates_enabled', False))
                     self.currency_updates_delay_minutes = config.get('currency_updates_delay_minutes', DEFAULT_CONFIG.get('currency_updates_delay_minutes', 60))
                     self.currency_display_area_coords = config.get('currency_display_area_coords', None) # Expects (x1, y1, x2, y2) or None
+                    self.currency_change_threshold = config.get('currency_change_threshold', DEFAULT_CONFIG.get('currency_change_threshold', 12))
+                    self.webhook_coalesce_ms = config.get('webhook_coalesce_ms', DEFAULT_CONFIG.get('webhook_coalesce_ms', 250))
+                    self.webhook_routes = config.get('webhook_routes', [])
+                    self.screenshot_format = config.get('screenshot_format', DEFAULT_CONFIG.get('screenshot_format', "PNG"))
+                    self.screenshot_quality = config.get('screenshot_quality', DEFAULT_CONFIG.get('screenshot_quality', 80))
+                    self.screenshot_max_dimension = config.get('screenshot_max_dimension', DEFAULT_CONFIG.get('screenshot_max_dimension', 0))
 
                     if isinstance(loaded_coords, (list, tuple)):
                         if len(loaded_coords) == 2:
@@ -273,6 +297,12 @@ class Config:
                     'currency_updates_delay_minutes': currency_updates_delay_setting,
                     'currency_display_area_coords': self.currency_display_area_coords, # This will be set by calibration
                     'merchant_shop_area_coords': self.merchant_shop_area_coords, # New, set by calibration
+                    'currency_change_threshold': self.currency_change_threshold,
+                    'webhook_coalesce_ms': self.webhook_coalesce_ms,
+                    'webhook_routes': self.webhook_routes,
+                    'screenshot_format': self.screenshot_format,
+                    'screenshot_quality': self.screenshot_quality,
+                    'screenshot_max_dimension': self.screenshot_max_dimension,
                 }
             else:
                 # No app instance, save current config values
@@ -309,6 +339,12 @@ class Config:
                     'currency_updates_delay_minutes': self.currency_updates_delay_minutes,
                     'currency_display_area_coords': self.currency_display_area_coords,
                     'merchant_shop_area_coords': self.merchant_shop_area_coords, # New
+                    'currency_change_threshold': self.currency_change_threshold,
+                    'webhook_coalesce_ms': self.webhook_coalesce_ms,
+                    'webhook_routes': self.webhook_routes,
+                    'screenshot_format': self.screenshot_format,
+                    'screenshot_quality': self.screenshot_quality,
+                    'screenshot_max_dimension': self.screenshot_max_dimension,
                 }
                 
             with open(self.config_file, 'w') as f:
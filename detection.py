@@ -1,32 +1,362 @@
 import os
 import time
 import re
-from datetime import datetime
-from utils import read_last_n_lines, extract_timestamp, is_roblox_running
+import contextlib
+import json
+from types import MappingProxyType
+from utils import (read_last_n_lines, extract_timestamp, RobloxProcessTracker, LogTailer, LogDirCache, dir_mtime,
+                   iter_lines_reversed, APP_DATA_DIR, DedupCache, BackgroundFileWriter)
+from log_watcher import LogWatcher
+from ropro import invite_api_url
+from server_session import ServerSession, ENTERING_KINDS
+from server_parser import ServerLineParser, SERVER_LINE_KEYWORDS
+from webhooks import (PRIORITIES, PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL,
+                      EVENT_HATCH, EVENT_RIFT, EVENT_SERVER, EVENT_STATUS)
+
+# Regex pattern for hatch detection
+HATCH_PATTERN = re.compile(r'<b><font color="#[0-9a-fA-F]{6}">([^<]+)</font> just hatched a <font color="([^"]+)">([^<]+?)(?: \(([^)]+%)\))?</font></b>')
+
+class TriggerMatcher:
+    """Finds which events a log line triggers using a single precompiled regex pass.
+
+    triggers maps each literal trigger string to the event name it signals. Several
+    triggers may share an event name. Lines without any trigger are rejected by one
+    failed regex search.
+    """
+
+    def __init__(self, triggers):
+        self._events = dict(triggers)
+        # Longest first so a trigger that contains another one wins at the same position
+        alternatives = sorted(self._events, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(t) for t in alternatives))
+
+    def match(self, line):
+        """Return the set of event names triggered by line (empty if none)."""
+        if not self._pattern.search(line):
+            return frozenset()
+        return frozenset(self._events[m.group(0)] for m in self._pattern.finditer(line))
+
+# Triggers handled in code rather than by the rules file
+BUILTIN_TRIGGERS = {
+    **{keyword: "server" for keyword in SERVER_LINE_KEYWORDS},
+    "just hatched a": "hatch",
+}
+
+# A rules file in the app data folder adds rules and overrides the built-in ones by id
+RULES_FILENAME = "event_rules.json"
+USER_RULES_FILE = os.path.join(APP_DATA_DIR, "Rules", RULES_FILENAME)
+
+# Built-in event rules, in the rules file's JSON layout; earlier rules win when several trigger on one line
+DEFAULT_RULES = (
+    {
+        "id": "royal_chest",
+        "trigger": "🔮",
+        "status": "✨ Royal chest detected!",
+        "title": "✨ ROYAL CHEST DETECTED! ✨",
+        "description": "A royal chest has been found in the chat!",
+        "image_url": "https://ps99.biggamesapi.io/image/76803303814891",
+        "color": "#9b59b6",
+        "ping": {"setting": "royal_chest"},
+    },
+    {
+        "id": "gum_rift",
+        "trigger": "Bring us your gum, Earthlings!",
+        "status": "🫧 Gum Rift detected!",
+        "title": "🫧 GUM RIFT DETECTED! 🫧",
+        "description": "A gum rift has been found in the chat!",
+        "color": "#ff69b4",
+        "ping": {"setting": "gum_rift"},
+    },
+    {
+        "id": "silly_egg",
+        "trigger": "we're so silly and fun",
+        "status": "😂 Silly Egg detected!",
+        "title": "😂 SILLY EGG DETECTED! 😂",
+        "description": "A Silly Egg has been found in the chat!",
+        "color": "#f1c40f",
+        "ping": {"content": "@everyone"},
+    },
+    {
+        "id": "dice_chest",
+        "trigger": "Feeling lucky..?",
+        "status": "🎲 Dice Chest detected!",
+        "title": "🎲 DICE CHEST DETECTED! 🎲",
+        "description": "A dice chest has been found in the chat!",
+        "color": "#3498db",
+        "ping": {"setting": "dice_chest"},
+    },
+)
+
+# Keys of recently notified lines, kept across restarts so old lines never re-fire
+SEEN_LINES_FILE = os.path.join(APP_DATA_DIR, "seen_lines.bin")
+
+# Where the monitor left off in the log (file identity, byte offset, server state)
+CHECKPOINT_FILE = os.path.join(APP_DATA_DIR, "tail_checkpoint.json")
+CHECKPOINT_VERSION = 1
+
+class EventRule:
+    """A declarative chat-trigger rule: what to look for and which notification to send."""
+
+    DEDUP_POLICIES = ("batch", "none")
+
+    def __init__(self, rule_id, trigger, title, description="", status=None, image_url=None,
+                 color=0x7289DA, ping=None, dedup="batch", enabled=True, priority=PRIORITY_CRITICAL, tags=()):
+        self.id = rule_id
+        self.trigger = trigger
+        self.title = title
+        self.description = description
+        self.status = status or f"{title} detected!"
+        self.image_url = image_url
+        self.color = color
+        self.ping = ping or {}
+        self.dedup = dedup
+        self.enabled = enabled
+        self.priority = priority
+        self.tags = list(tags)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a rule from its JSON form, raising ValueError if it is malformed."""
+        rule_id = data.get("id")
+        trigger = data.get("trigger")
+        title = data.get("title")
+        if not rule_id or not trigger or not title:
+            raise ValueError(f"rule {rule_id or '?'} needs 'id', 'trigger' and 'title'")
+        if rule_id in BUILTIN_TRIGGERS.values():
+            raise ValueError(f"rule id '{rule_id}' is reserved")
+
+        color = data.get("color", 0x7289DA)
+        if isinstance(color, str):
+            color = int(color.lstrip("#").replace("0x", ""), 16)
+
+        dedup = data.get("dedup", "batch")
+        if dedup not in cls.DEDUP_POLICIES:
+            raise ValueError(f"rule {rule_id}: unknown dedup policy '{dedup}'")
+
+        priority = data.get("priority", PRIORITY_CRITICAL)
+        if priority not in PRIORITIES:
+            raise ValueError(f"rule {rule_id}: unknown priority '{priority}'")
+
+        return cls(
+            rule_id, trigger, title,
+            description=data.get("description", ""),
+            status=data.get("status"),
+            image_url=data.get("image_url"),
+            color=color,
+            ping=data.get("ping"),
+            dedup=dedup,
+            enabled=data.get("enabled", True),
+            priority=priority,
+            tags=data.get("tags", []),
+        )
+
+    def route_tags(self):
+        """Tags webhook routes can filter on: the rule id plus any tags from the rules file"""
+        return [self.id] + [tag for tag in self.tags if tag != self.id]
+
+    def ping_content(self, settings):
+        """Resolve the message content (mention) for this rule from its ping settings."""
+        if "content" in self.ping:
+            return self.ping["content"] or None
+        setting = self.ping.get("setting")
+        if not setting or settings is None:
+            return None
+        return settings.rule_pings.get(setting)
+
+class EventRuleSet:
+    """Loads event rules from the rules files and compiles them into one TriggerMatcher.
+
+    Call reload_if_changed() periodically; it costs one stat per rules file and
+    only re-reads and recompiles when a file was edited.
+    """
+
+    def __init__(self, paths=(USER_RULES_FILE,), defaults=DEFAULT_RULES):
+        self.paths = tuple(paths)
+        self.defaults = tuple(defaults)
+        self.rules = []
+        self.matcher = TriggerMatcher(BUILTIN_TRIGGERS)
+        self.errors = []
+        self._mtimes = None
+
+    def _current_mtimes(self):
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def load(self):
+        """(Re)load the built-in rules and every rules file that exists.
+
+        Later files override earlier rules with the same id; an override keeps the
+        position, and so the precedence, of the rule it replaces. If a file can't be
+        read, the problem is reported in errors and the last good rules are kept.
+        """
+        self._mtimes = self._current_mtimes()
+        rules_by_id = {}
+        self._add_rules(rules_by_id, self.defaults)
+        errors = []
+        for path in self.paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._add_rules(rules_by_id, data.get("rules", []))
+            except (OSError, ValueError, AttributeError) as e:
+                errors.append(f"Error loading event rules from {path}: {e}")
+
+        self.errors = errors
+        if errors and self.rules:
+            return False  # Keep the last good rules rather than dropping detection
+
+        self.rules = [rule for rule in rules_by_id.values() if rule.enabled]
+        triggers = dict(BUILTIN_TRIGGERS)
+        for rule in self.rules:
+            triggers.setdefault(rule.trigger, rule.id)
+        self.matcher = TriggerMatcher(triggers)
+        return True
+
+    @staticmethod
+    def _add_rules(rules_by_id, rules_data):
+        for rule_data in rules_data:
+            rule = EventRule.from_dict(rule_data)
+            rules_by_id[rule.id] = rule  # Replacing an existing id keeps its place in the order
+
+    def reload_if_changed(self):
+        """Reload the rules if any rules file changed since the last load. Returns True if reloaded."""
+        if self._current_mtimes() == self._mtimes:
+            return False
+        return self.load()
+
+    def first_match(self, events):
+        """Return the highest-priority (earliest listed) rule among the triggered events."""
+        for rule in self.rules:
+            if rule.id in events:
+                return rule
+        return None
+
+class DetectorSettings:
+    """Read-only copy of the UI settings the detector uses.
+
+    Built on the GUI thread (from_app) whenever scanning starts or one of the
+    settings changes, then swapped into RiftDetector.settings in one assignment,
+    so the monitor thread only reads plain attributes and never touches a widget.
+    """
+
+    __slots__ = ("launcher", "server_mode", "private_server_link", "hatch_detection_enabled",
+                 "hatch_username", "hatch_ping_user_id", "hatch_secret_ping", "rule_pings")
+
+    def __init__(self, launcher="Auto (Detect)", server_mode="Private Server", private_server_link="",
+                 hatch_detection_enabled=False, hatch_username="", hatch_ping_user_id="", hatch_secret_ping=False,
+                 rule_pings=None):
+        values = dict(
+            launcher=launcher,
+            server_mode=server_mode,
+            private_server_link=private_server_link,
+            hatch_detection_enabled=hatch_detection_enabled,
+            hatch_username=hatch_username,
+            hatch_ping_user_id=hatch_ping_user_id,
+            hatch_secret_ping=hatch_secret_ping,
+            rule_pings=MappingProxyType(dict(rule_pings or {})),  # ping setting -> mention
+        )
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DetectorSettings is read-only; build a new one instead")
+
+    def __delattr__(self, name):
+        raise AttributeError("DetectorSettings is read-only; build a new one instead")
+
+    @property
+    def public_server(self):
+        return self.server_mode == "Public Server"
+
+    @staticmethod
+    def ping_settings(app):
+        """Names of the ping settings the UI has, e.g. "royal_chest" for royal_chest_ping_entry"""
+        suffix = "_ping_entry"
+        return tuple(name[:-len(suffix)] for name in dir(app) if name.endswith(suffix))
+
+    @classmethod
+    def from_app(cls, app, ping_settings=None):
+        """Snapshot the current widget values. Must be called on the GUI thread."""
+        if ping_settings is None:
+            ping_settings = cls.ping_settings(app)
+
+        rule_pings = {}
+        for setting in ping_settings:
+            ping_entry = getattr(app, f"{setting}_ping_entry", None)
+            ping_type_combo = getattr(app, f"{setting}_ping_type_combo", None)
+            ping_id = ping_entry.text().strip() if ping_entry else ""
+            if not ping_id:
+                continue
+            ping_type = ping_type_combo.currentText() if ping_type_combo else "User"
+            rule_pings[setting] = f"<@{ping_id}>" if ping_type == "User" else f"<@&{ping_id}>"
+
+        def text(name, default=""):
+            widget = getattr(app, name, None)
+            return widget.text().strip() if widget is not None else default
+
+        def checked(name):
+            widget = getattr(app, name, None)
+            return widget.isChecked() if widget is not None else False
+
+        launcher_combo = getattr(app, 'launcher_combo', None)
+        server_mode_combo = getattr(app, 'server_mode_combo', None)
+        return cls(
+            launcher=launcher_combo.currentText() if launcher_combo is not None else "Auto (Detect)",
+            server_mode=server_mode_combo.currentText() if server_mode_combo is not None else "Private Server",
+            private_server_link=text('pslink_entry'),
+            hatch_detection_enabled=checked('hatch_detection_enabled_checkbox'),
+            hatch_username=text('hatch_username_entry'),
+            hatch_ping_user_id=text('hatch_userid_entry'),
+            hatch_secret_ping=checked('hatch_secret_ping_checkbox'),
+            rule_pings=rule_pings,
+        )
+
 
 class RiftDetector:
     """Class for detecting various rifts and events in Roblox logs"""
+
+    # Longest the monitor loop sleeps without a log change before running its periodic checks
+    MONITOR_WAIT_TIMEOUT = 5.0
+    # Minimum seconds between checkpoint writes while monitoring
+    CHECKPOINT_INTERVAL = 2.0
+    # Most log data replayed when resuming from a checkpoint; older lines are skipped
+    CATCH_UP_MAX_BYTES = 2 * 1024 * 1024
     
-    def __init__(self, app=None):
+    def __init__(self, app=None, process_tracker=None):
         self.app = app
-        self.processed_lines = set()
+        self.settings = DetectorSettings()  # Replaced by the GUI thread, see DetectorSettings
+        self.seen_lines = DedupCache(capacity=4096)
+        self.seen_lines.load(SEEN_LINES_FILE)
         self.current_log = None
+        self.tailer = LogTailer()  # Reads only the bytes appended since the last poll
+        self.watcher = LogWatcher()  # Wakes the monitor loop as soon as the log changes
+        self.event_rules = EventRuleSet()
+        self.log_dir_cache = LogDirCache()  # Newest file per log directory, rescanned only when the directory changes
+        self.roblox_process = process_tracker or RobloxProcessTracker()  # Rescans processes only on new logs/exits
+        self.state_writer = BackgroundFileWriter()  # Checkpoints are written off the monitor thread
+        self._last_checkpoint = None  # Last checkpoint state handed to state_writer
+        self._last_checkpoint_time = 0
+        self._resolved_log_dir = None
+        self._resolved_dir_state = None
         self.last_line_time = time.time()
         self.last_timestamp = None
         self.lock_log_file = False
         # self.last_notification_time = {} # Store last notification time per event type
 
         # Variables to track last processed line within the current batch for each event type
-        self.current_batch_last_royal_chest_line = None
-        self.current_batch_last_gum_rift_line = None
-        self.current_batch_last_silly_egg_line = None
-        self.current_batch_last_dice_chest_line = None
+        self.current_batch_last_rule_lines = {}  # rule id -> line
         self.current_batch_last_hatch_trigger_line = None
 
         # Server tracking
-        self.current_job_id = None
-        self.current_place_id = None
-        self.last_server_change_time = None  # Timestamp of last server change (will be stored as string)
+        self.server_session = ServerSession()  # Which server we're in, followed line by line
+        self.server_parser = ServerLineParser()  # Also counts which join line formats the logs use
         self.initial_server_scan_done = False  # Flag to track if we've done a full scan
         
         # Image URLs for embeds
@@ -58,6 +388,20 @@ class RiftDetector:
             "Unicorn", "Virus"
         }
         
+
+    @property
+    def current_job_id(self):
+        return self.server_session.job_id
+
+    @property
+    def current_place_id(self):
+        return self.server_session.place_id
+
+    @property
+    def last_server_change_time(self):
+        """Epoch seconds (float) of the last server change"""
+        return self.server_session.changed_at
+
     def get_log_dir(self):
         """Returns the appropriate log directory based on available Roblox launchers."""
         home = os.path.expanduser("~")
@@ -68,59 +412,74 @@ class RiftDetector:
             "Roblox": os.path.join(home, "AppData", "Local", "Roblox", "Logs")
         }
 
-        if self.app and hasattr(self.app, 'launcher_combo'):
-            choice = self.app.launcher_combo.currentText()
-            if choice in log_paths:
-                return log_paths[choice]
-            elif choice == "Auto (Detect)":
-                pass  # Fall through to auto-detection
+        choice = self.settings.launcher
+        if choice in log_paths:
+            return log_paths[choice]
+        elif choice == "Auto (Detect)":
+            pass  # Fall through to auto-detection
 
+        # Auto-detection only needs redoing when one of the launcher directories gained or lost files
+        dir_state = tuple(dir_mtime(path) for path in log_paths.values())
+        if self._resolved_log_dir and dir_state == self._resolved_dir_state:
+            return self._resolved_log_dir
+
+        self._resolved_log_dir = self._detect_log_dir(log_paths)
+        self._resolved_dir_state = dir_state
+        return self._resolved_log_dir
+
+    def _detect_log_dir(self, log_paths):
+        """Pick the launcher log directory that is in use, preferring the most recently written one."""
         valid_paths = []
         for launcher, path in log_paths.items():
             if os.path.isdir(path):
                 try:
-                    if any(os.path.isfile(os.path.join(path, f)) for f in os.listdir(path)):
+                    if self.log_dir_cache.latest(path)[0]:
                         valid_paths.append((launcher, path))
 
-                        if self.app and hasattr(self.app, 'launcher_status'):
-                            self.app.launcher_status.setText(f"Found {launcher} logs")
+                        self.show_launcher_status(f"Found {launcher} logs")
                 except Exception:
                     continue
 
-        if is_roblox_running() and valid_paths:
+        # A launcher directory gained or lost files, possibly because Roblox was (re)started
+        self.roblox_process.invalidate()
+        if self.roblox_process.is_running() and valid_paths:
             most_recent = None
             most_recent_time = 0
             most_recent_launcher = None
 
             for launcher, path in valid_paths:
                 try:
-                    files = [os.path.join(path, f) for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
-                    if files:
-                        latest = max(files, key=os.path.getmtime)
-                        mod_time = os.path.getmtime(latest)
-                        if mod_time > most_recent_time:
-                            most_recent = path
-                            most_recent_time = mod_time
-                            most_recent_launcher = launcher
+                    latest, mod_time = self.log_dir_cache.latest(path)
+                    if latest and mod_time > most_recent_time:
+                        most_recent = path
+                        most_recent_time = mod_time
+                        most_recent_launcher = launcher
                 except Exception:
                     continue
 
             if most_recent:
-                if self.app and hasattr(self.app, 'launcher_status'):
-                    self.app.launcher_status.setText(f"Active: {most_recent_launcher}")
+                self.show_launcher_status(f"Active: {most_recent_launcher}")
                 return most_recent
 
         for launcher_name in ["Fishstrap", "Bloxstrap", "Roblox"]:
             for launcher, path in valid_paths:
                 if launcher == launcher_name:
-                    if self.app and hasattr(self.app, 'launcher_status'):
-                        self.app.launcher_status.setText(f"Using: {launcher}")
+                    self.show_launcher_status(f"Using: {launcher}")
                     return path
 
-        if self.app and hasattr(self.app, 'launcher_status'):
-            self.app.launcher_status.setText("No logs found")
+        self.show_launcher_status("No logs found")
 
         return log_paths["Fishstrap"]
+
+    def show_launcher_status(self, text):
+        """Update the launcher label; the signal applies it on the GUI thread"""
+        if self.app and hasattr(self.app, 'launcher_status_signal'):
+            self.app.launcher_status_signal.emit(text)
+
+    def show_server(self, job_id, place_id, link):
+        """Report the current server to the UI; updates are applied (and coalesced) on the GUI thread"""
+        if self.app and hasattr(self.app, 'server_changed_signal'):
+            self.app.server_changed_signal.emit(job_id, place_id or "", link or "")
     
     def get_latest_log_file(self):
         """Get the most recently modified log file"""
@@ -129,12 +488,11 @@ class RiftDetector:
             if not os.path.isdir(log_dir):
                  print(f"Log directory not found: {log_dir}")
                  return None
-            files = [os.path.join(log_dir, f) for f in os.listdir(log_dir) if os.path.isfile(os.path.join(log_dir, f))]
-            return max(files, key=os.path.getmtime) if files else None
+            return self.log_dir_cache.latest(log_dir)[0]
         except Exception as e:
             print(f"Error finding latest log file: {e}")
-            if self.app:
-                self.app.update_status(f"Error finding log file: {e}")
+            if hasattr(self, 'monitor_thread') and self.monitor_thread:
+                self.monitor_thread.update_status_signal.emit(f"Error finding log file: {e}")
             return None
     
     def monitor_log(self):
@@ -145,11 +503,18 @@ class RiftDetector:
                 "RiftScope is now monitoring for rare rifts!",
                 None,
                 0x7289DA,
-                None
+                None,
+                PRIORITY_NORMAL,
+                EVENT_STATUS,
+                [],
+                self.detected_at()
             )
         self.last_line_time = time.time()
         self.last_timestamp = None 
-        self.processed_lines.clear() 
+        self.tailer.close()
+        self.log_dir_cache.invalidate()
+        self.roblox_process.invalidate()
+        self._resolved_log_dir = None
 
         log_dir = self.get_log_dir()
         launcher_used = "Unknown"
@@ -161,6 +526,9 @@ class RiftDetector:
         if hasattr(self, 'monitor_thread') and self.monitor_thread:
             self.monitor_thread.update_status_signal.emit(f"Monitoring using {launcher_used} logs at {log_dir}")
 
+        # Pick up where the previous run stopped if it was watching the same log
+        resume_checkpoint = self.load_checkpoint()
+
         if self.lock_log_file:
             locked_log = self.get_latest_log_file()
             if locked_log:
@@ -175,32 +543,35 @@ class RiftDetector:
         # Debug flag - set to true to log all lines for debugging server detection
         debug_log_all_lines = False
         
-        # Keep track of the last time we checked for server changes
-        last_server_check_time = time.time()
-        
-        # Time interval between full log scans for server changes (in seconds)
-        server_check_interval = 90  # Less frequent to reduce spam
-        
+        if resume_checkpoint:
+            if self.lock_log_file:
+                resume_log = self.current_log
+            else:
+                resume_log = self.get_latest_log_file()
+            if not resume_log or os.path.normcase(resume_log) != os.path.normcase(resume_checkpoint["path"]):
+                resume_checkpoint = None
+            else:
+                self.current_log = resume_checkpoint["path"] = resume_log
+                self.restore_server_state(resume_checkpoint)
+
         # If using public server mode and no current server, perform an initial full scan
-        if (self.app and hasattr(self.app, 'server_mode_combo') and 
-            self.app.server_mode_combo.currentText() == "Public Server" and 
-            not self.current_job_id and not self.initial_server_scan_done):
+        if self.settings.public_server and not self.current_job_id and not self.initial_server_scan_done:
             
             if hasattr(self, 'monitor_thread') and self.monitor_thread:
                 self.monitor_thread.update_status_signal.emit("🔍 Performing initial full log scan for server ID...")
             
             # Get the latest log
+            if not self.current_log:
+                self.current_log = self.get_latest_log_file()
             if self.current_log:
                 try:
-                    # Read the entire log file
-                    with open(self.current_log, 'r', encoding='utf-8', errors='ignore') as f:
-                        full_log_lines = f.readlines()
-                    
                     if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        self.monitor_thread.update_status_signal.emit(f"Scanning {len(full_log_lines)} lines for server info...")
+                        self.monitor_thread.update_status_signal.emit(f"Scanning {os.path.basename(self.current_log)} backwards for server info...")
                     
-                    # Check for server info
-                    self.check_for_server_changes(full_log_lines)
+                    # Walk the log newest-first and stop at the most recent server join,
+                    # so huge trace-level logs are never loaded into memory
+                    with contextlib.closing(iter_lines_reversed(self.current_log)) as newest_first_lines:
+                        self.check_for_server_changes(newest_first_lines, newest_first=True)
                     
                     # Mark the initial scan as complete
                     self.initial_server_scan_done = True
@@ -214,18 +585,15 @@ class RiftDetector:
                 except Exception as e:
                     if hasattr(self, 'monitor_thread') and self.monitor_thread:
                         self.monitor_thread.update_status_signal.emit(f"Error during initial scan: {e}")
-                    
-                # Reset the last check time after the initial scan
-                last_server_check_time = time.time()
 
         while self.app and self.app.running: 
             if not self.lock_log_file or not self.current_log:
                 latest_log = self.get_latest_log_file()
                 if latest_log and latest_log != self.current_log:
                     self.current_log = latest_log
+                    self.roblox_process.invalidate()
                     if hasattr(self, 'monitor_thread') and self.monitor_thread:
                         self.monitor_thread.update_status_signal.emit(f"Monitoring log file: {os.path.basename(latest_log)}")
-                    self.processed_lines.clear() 
                     self.last_timestamp = None 
 
             # Check again if the app is still running
@@ -244,166 +612,67 @@ class RiftDetector:
                 if not self.app or not self.app.running:
                     break
                     
-                # Increase the number of lines to read to improve chances of catching server joins
-                lines = read_last_n_lines(self.current_log, n=30)
-                new_line_found = False
+                # Start tailing a newly selected log. The log that is current when scanning
+                # starts is read from its end; logs we switch to later are read in full.
+                if self.tailer.path != self.current_log:
+                    if resume_checkpoint and self.current_log == resume_checkpoint["path"]:
+                        self.resume_from_checkpoint(resume_checkpoint)
+                    else:
+                        self.tailer.open(self.current_log, from_end=self.tailer.path is None)
+                    resume_checkpoint = None
+                self.watcher.watch(self.current_log, os.path.dirname(self.current_log))
+
+                lines = self.tailer.read_lines()
+                new_line_found = bool(lines)
                 
                 # Reset batch-specific last line trackers
-                self.current_batch_last_royal_chest_line = None
-                self.current_batch_last_gum_rift_line = None
-                self.current_batch_last_silly_egg_line = None
-                self.current_batch_last_dice_chest_line = None
+                self.current_batch_last_rule_lines.clear()
                 self.current_batch_last_hatch_trigger_line = None
 
+                # Pick up edits to the rules file without restarting
+                if self.event_rules.reload_if_changed():
+                    self._report_event_rules()
+
                 # Check again if app is still running after file read
                 if not self.app or not self.app.running:
                     break
                     
-                # Periodically do a full scan for server changes, but only if using public server mode
                 current_time = time.time()
-                if (current_time - last_server_check_time > server_check_interval and 
-                    self.app and hasattr(self.app, 'server_mode_combo') and 
-                    self.app.server_mode_combo.currentText() == "Public Server"):
-                    
-                    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        self.monitor_thread.update_status_signal.emit("Performing periodic server check...")
-                    
-                    # Do a deep scan with more lines to find server changes (limited to 500 lines)
-                    deep_scan_lines = read_last_n_lines(self.current_log, n=500)
-                    
-                    # Check again if app is still running before expensive operation
-                    if not self.app or not self.app.running:
-                        break
-                        
-                    self.check_for_server_changes(deep_scan_lines)
-                    last_server_check_time = current_time
 
                 for line in lines:
                     # Check if app is still running periodically
                     if not self.app or not self.app.running:
                         break
                         
-                    if not line.strip():
-                        continue
-
                     # Debug option to print all lines for troubleshooting
                     if debug_log_all_lines and hasattr(self, 'monitor_thread') and self.monitor_thread:
                         self.monitor_thread.update_status_signal.emit(f"DEBUG Line: {line[:100]}...")
+
+                    # One pass over the line finds every trigger; most lines have none
+                    events = self.event_rules.matcher.match(line)
+                    if not events:
+                        continue
                         
-                    # Extract timestamp from line
-                    line_timestamp = extract_timestamp(line)
-                    
-                    # Create a hash for deduplication
-                    line_hash = hash(line) 
-                    if line_hash in self.processed_lines:
+                    # Skip lines that were already notified (the line includes its timestamp)
+                    if not self.seen_lines.add(DedupCache.key_for(line)):
                         continue
 
-                    new_line_found = True 
-                    self.processed_lines.add(line_hash) 
-
-                    if len(self.processed_lines) > 500:
-                        try:
-                            self.processed_lines.pop()
-                        except KeyError:
-                            pass 
-
-                    timestamp = extract_timestamp(line)
-                    
-                    # Regex pattern for hatch detection
-                    hatch_pattern = re.compile(r'<b><font color="#[0-9a-fA-F]{6}">([^<]+)</font> just hatched a <font color="([^"]+)">([^<]+?)(?: \(([^)]+%)\))?</font></b>')
+                    # Extract timestamp from line
+                    line_timestamp = extract_timestamp(line)
                     
-                    # Check for server changes only in specific type of lines to reduce false positives
-                    if any(keyword in line for keyword in ["Joining game", "JoinGame", "Game (", "TeleportService:Teleport", "Disconnected from Game", "Connected to Game"]):
-                        # Only process server join events if we're in public server mode
-                        if self.app and hasattr(self.app, 'server_mode_combo') and self.app.server_mode_combo.currentText() == "Public Server":
-                            self.check_for_server_changes([line])
+                    # Server join/connect/teleport/disconnect lines move the server session along
+                    if "server" in events:
+                        self.detect_server_join(line, line_timestamp)
                     
-                    # Royal chest detection
-                    if "🔮" in line:
-                        # Check if this line has already triggered a royal chest event in this batch
-                        if line != self.current_batch_last_royal_chest_line:
-                            if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                                self.monitor_thread.update_status_signal.emit("✨ Royal chest detected!")
-                                ping_id = self.app.royal_chest_ping_entry.text().strip()
-                                ping_type = self.app.royal_chest_ping_type_combo.currentText()
-                                ping_mention = f"<@{ping_id}>" if ping_type == "User" else f"<@&{ping_id}>"
-                                self.monitor_thread.webhook_signal.emit(
-                                    "✨ ROYAL CHEST DETECTED! ✨",
-                                    f"A royal chest has been found in the chat!",
-                                    self.royal_image_url,
-                                    0x9b59b6,
-                                    ping_mention if ping_id else None
-                                )
-                                self.current_batch_last_royal_chest_line = line
-                        # else: # Optional: Log if skipped due to being a duplicate in the batch
-                        #    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        #        self.monitor_thread.update_status_signal.emit("Royal chest (duplicate in batch). Skipping ping.")
-
-                    # Gum rift detection
-                    elif "Bring us your gum, Earthlings!" in line:
-                        # Check if this line has already triggered a gum rift event in this batch
-                        if line != self.current_batch_last_gum_rift_line:
-                            if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                                self.monitor_thread.update_status_signal.emit("🫧 Gum Rift detected!")
-                                ping_id = self.app.gum_rift_ping_entry.text().strip()
-                                ping_type = self.app.gum_rift_ping_type_combo.currentText()
-                                ping_mention = f"<@{ping_id}>" if ping_type == "User" else f"<@&{ping_id}>"
-                                self.monitor_thread.webhook_signal.emit(
-                                    "🫧 GUM RIFT DETECTED! 🫧",
-                                    f"A gum rift has been found in the chat!",
-                                    None,
-                                    0xFF69B4,
-                                    ping_mention if ping_id else None
-                                )
-                                self.current_batch_last_gum_rift_line = line
-                        # else: # Optional: Log if skipped
-                        #    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        #        self.monitor_thread.update_status_signal.emit("Gum rift (duplicate in batch). Skipping ping.")
-
-                    # Silly egg detection
-                    elif "we're so silly and fun" in line:
-                        # Check if this line has already triggered a silly egg event in this batch
-                        if line != self.current_batch_last_silly_egg_line:
-                            if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                                self.monitor_thread.update_status_signal.emit("😂 Silly Egg detected!")
-                                self.monitor_thread.webhook_signal.emit(
-                                    "😂 SILLY EGG DETECTED! 😂",
-                                    f"A Silly Egg has been found in the chat!",
-                                    None, 
-                                    0xf1c40f, 
-                                    "@everyone" 
-                                )
-                                self.current_batch_last_silly_egg_line = line
-                        # else: # Optional: Log if skipped
-                        #    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        #        self.monitor_thread.update_status_signal.emit("Silly egg (duplicate in batch). Skipping ping.")
-
-                    # Dice Chest detection
-                    elif "Feeling lucky..?" in line:
-                        # Check if this line has already triggered a dice chest event in this batch
-                        if line != self.current_batch_last_dice_chest_line:
-                            if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                                self.monitor_thread.update_status_signal.emit("🎲 Dice Chest detected!")
-                                ping_id = self.app.dice_chest_ping_entry.text().strip()
-                                ping_type = self.app.dice_chest_ping_type_combo.currentText()
-                                ping_mention = f"<@{ping_id}>" if ping_type == "User" else f"<@&{ping_id}>"
-                                self.monitor_thread.webhook_signal.emit(
-                                    "🎲 DICE CHEST DETECTED! 🎲",
-                                    f"A dice chest has been found in the chat!",
-                                    None,
-                                    0x3498db,
-                                    ping_mention if ping_id else None
-                                )
-                                self.current_batch_last_dice_chest_line = line
-                        # else: # Optional: Log if skipped
-                        #    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        #        self.monitor_thread.update_status_signal.emit("Dice chest (duplicate in batch). Skipping ping.")
+                    # Rift/chest/egg detection from the rules file
+                    rule = self.event_rules.first_match(events)
+                    if rule:
+                        self.fire_event_rule(rule, line, line_timestamp)
 
                     # Hatch detection
-                    elif (self.app and hasattr(self.app, 'hatch_detection_enabled_checkbox') and 
-                         self.app.hatch_detection_enabled_checkbox.isChecked() and "just hatched a" in line):
+                    elif self.settings.hatch_detection_enabled and "hatch" in events:
                         print(f"[DEBUG] Found 'just hatched a' in line: {line.strip()}") 
-                        match = hatch_pattern.search(line)
+                        match = HATCH_PATTERN.search(line)
                         if match:
                             # Pass current_real_time for cooldown check within the function
                             self.process_hatch_match(match, current_time, line_timestamp, line)
@@ -411,8 +680,10 @@ class RiftDetector:
                 if new_line_found:
                     self.last_line_time = time.time() 
 
+                self.save_checkpoint()
+
                 if time.time() - self.last_line_time > 60:
-                    if not is_roblox_running():
+                    if not self.roblox_process.is_running():
                         if hasattr(self, 'monitor_thread') and self.monitor_thread:
                             self.monitor_thread.update_status_signal.emit("⚠️ Roblox appears to be closed.")
                             self.monitor_thread.webhook_signal.emit(
@@ -420,7 +691,11 @@ class RiftDetector:
                                 "No new log lines detected recently and Roblox process not found.",
                                 None,
                                 0xe74c3c,
-                                None
+                                None,
+                                PRIORITY_NORMAL,
+                                EVENT_STATUS,
+                                [],
+                                self.detected_at()
                             )
                         self.last_line_time = time.time() 
 
@@ -432,223 +707,233 @@ class RiftDetector:
 
                 time.sleep(2)
 
-            time.sleep(0.75)
+            # Sleep until the log (or its directory) changes, or until the periodic checks are due
+            self.watcher.wait_for_change(timeout=self.MONITOR_WAIT_TIMEOUT)
+
+        self.save_checkpoint(force=True)
+        self.tailer.close()
+        self.report_server_line_formats()
+        if not self.state_writer.flush():
+            print("Timed out writing the monitor checkpoint")
+
+    def save_checkpoint(self, force=False):
+        """Queue the tail position, dedup cache and server state to be written to disk.
+
+        Writes happen on a background thread and at most every CHECKPOINT_INTERVAL
+        seconds unless force is set, so calling this after every batch is cheap.
+        """
+        now = time.time()
+        if not force and now - self._last_checkpoint_time < self.CHECKPOINT_INTERVAL:
+            return
+        if not self.tailer.path or not self.tailer.identity:
+            return
+
+        st_dev, st_ino = self.tailer.identity
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "path": self.tailer.path,
+            "dev": st_dev,
+            "ino": st_ino,
+            "offset": self.tailer.offset,
+            "current_job_id": self.current_job_id,
+            "current_place_id": self.current_place_id,
+            "last_server_change_time": self.last_server_change_time,
+        }
+        self._last_checkpoint_time = now
+        if state == self._last_checkpoint:
+            return
+        self._last_checkpoint = state
+        self.state_writer.submit(SEEN_LINES_FILE, self.seen_lines.to_bytes())
+        self.state_writer.submit(CHECKPOINT_FILE, json.dumps(dict(state, saved_at=now)).encode("utf-8"))
+
+    def load_checkpoint(self):
+        """Return the saved checkpoint if it still points at an existing log file, else None"""
+        try:
+            with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable checkpoint {CHECKPOINT_FILE}: {e}")
+            return None
+
+        if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION:
+            return None
+        try:
+            st = os.stat(checkpoint["path"])
+            identity = (int(checkpoint["dev"]), int(checkpoint["ino"]))
+            offset = int(checkpoint["offset"])
+        except (KeyError, TypeError, ValueError, OSError):
+            return None
+        if (st.st_dev, st.st_ino) != identity or st.st_size < offset:
+            return None  # Log was replaced or truncated since the checkpoint
+        return checkpoint
+
+    def restore_server_state(self, checkpoint):
+        """Restore the server the previous run was in, unless one is already known"""
+        if self.current_job_id or not checkpoint.get("current_job_id"):
+            return
+        self.server_session.restore(checkpoint["current_job_id"], checkpoint.get("current_place_id"),
+                                    checkpoint.get("last_server_change_time"))
+        self.initial_server_scan_done = True
+        if hasattr(self, 'monitor_thread') and self.monitor_thread:
+            self.monitor_thread.update_status_signal.emit(f"Restored server from checkpoint: {self.current_job_id[:8]}...")
+        if self.settings.public_server:
+            link = invite_api_url(self.current_job_id)
+            if self.app and hasattr(self.app, 'link_resolver'):
+                link = self.app.link_resolver.cached(self.current_job_id) or link
+                self.app.link_resolver.prefetch(self.current_job_id, callback=self.app.server_link_resolved_signal.emit)
+            self.show_server(self.current_job_id, self.current_place_id, link)
+
+    def resume_from_checkpoint(self, checkpoint):
+        """Open the tailer at the checkpoint offset, replaying at most CATCH_UP_MAX_BYTES"""
+        replay = self.tailer.resume(checkpoint["path"], int(checkpoint["offset"]),
+                                    identity=(checkpoint["dev"], checkpoint["ino"]),
+                                    max_catch_up=self.CATCH_UP_MAX_BYTES)
+        if hasattr(self, 'monitor_thread') and self.monitor_thread:
+            if replay is None:
+                self.monitor_thread.update_status_signal.emit("Checkpoint no longer matches the log, starting from the end")
+            elif replay:
+                self.monitor_thread.update_status_signal.emit(f"Resuming from checkpoint, catching up on {replay / 1024:.1f} KB of log")
             
-    def check_for_server_changes(self, lines):
-        """Check for server changes in the given lines"""
-        # Generic server detection keywords that work for all launchers
-        server_join_keywords = [
-            "Joining game", "JoinGame", 
-            "Game (", "ServerInstance", 
-            "Disconnected from Game", "Connected to Game",
-            "TeleportService:Teleport"
-        ]
-        
-        # Process lines in reverse chronological order (newest first)
-        for line in reversed(lines):
-            # Skip empty lines and lines without server-related keywords
-            if not line.strip() or not any(keyword in line for keyword in server_join_keywords):
+    @staticmethod
+    def detected_at(line_timestamp=None):
+        """Epoch time an event was detected: the log line's own timestamp if it is plausible, else now"""
+        now = time.time()
+        if line_timestamp and 0 <= now - line_timestamp < 24 * 60 * 60:
+            return line_timestamp
+        return now
+
+    def fire_event_rule(self, rule, line, line_timestamp=None):
+        """Send the status update and webhook for a matched event rule"""
+        # Check if this line has already triggered this rule in the current batch
+        if rule.dedup == "batch" and self.current_batch_last_rule_lines.get(rule.id) == line:
+            return
+        if hasattr(self, 'monitor_thread') and self.monitor_thread:
+            self.monitor_thread.update_status_signal.emit(rule.status)
+            self.monitor_thread.webhook_signal.emit(
+                rule.title,
+                rule.description,
+                rule.image_url,
+                rule.color,
+                rule.ping_content(self.settings),
+                rule.priority,
+                EVENT_RIFT,
+                rule.route_tags(),
+                self.detected_at(line_timestamp)
+            )
+            self.current_batch_last_rule_lines[rule.id] = line
+
+    def _report_event_rules(self):
+        """Emit the outcome of the last event rules (re)load"""
+        if not (hasattr(self, 'monitor_thread') and self.monitor_thread):
+            return
+        for error in self.event_rules.errors:
+            self.monitor_thread.update_status_signal.emit(f"⚠️ {error}")
+        if not self.event_rules.rules:
+            self.monitor_thread.update_status_signal.emit("⚠️ No event rules loaded. Rift detection is disabled.")
+        else:
+            self.monitor_thread.update_status_signal.emit(f"Loaded {len(self.event_rules.rules)} event rules.")
+
+    def check_for_server_changes(self, lines, newest_first=False):
+        """Find the server the player is in from the newest join line among lines.
+
+        Used for the initial scan when scanning starts. lines is in file order unless
+        newest_first is set, in which case it can be any newest-first iterable (such
+        as utils.iter_lines_reversed) and is consumed lazily.
+        """
+        for line in (lines if newest_first else reversed(lines)):
+            if not self.event_rules.matcher.match(line) & {"server"}:
+                continue
+            parsed = self.server_parser.parse(line)
+            if not parsed or parsed.kind not in ENTERING_KINDS:
                 continue
-            
-            # Extract timestamp from the line
             line_timestamp = extract_timestamp(line)
-            
-            # Skip older timestamps if we've already detected a server change
-            if line_timestamp and self.last_server_change_time:
-                # Convert timestamp to string for comparison if it's a datetime
-                if isinstance(line_timestamp, datetime):
-                    line_timestamp_str = line_timestamp.isoformat()
-                else:
-                    line_timestamp_str = str(line_timestamp)
-                    
-                if line_timestamp_str <= self.last_server_change_time:
-                    continue
-                
-            # Try to detect a server change in this line
-            if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                self.monitor_thread.update_status_signal.emit(f"Checking for server info: {line[:100]}...")
-                
-            result = self.detect_server_join(line, line_timestamp)
-            if result:
-                # A new server was found after our last detected change, so we can stop
+            if line_timestamp and self.last_server_change_time and line_timestamp <= self.last_server_change_time:
+                # Everything further back is older still
                 break
-            
-    def detect_server_join(self, line, line_timestamp=None):
-        """Detect when the user joins a server and extract JobID and PlaceID"""
+            if self.detect_server_join(line, line_timestamp, parsed):
+                break
+
+    def detect_server_join(self, line, line_timestamp=None, parsed=None):
+        """Feed one server line to the session. Returns (job id, place id) if it changed the server.
+
+        parsed is the line's ServerLine if the caller already parsed it.
+        """
         try:
-            # Universal patterns that work for all launchers
-            patterns = [
-                # Standard JobID and PlaceID patterns
-                re.compile(r"Joining game '([^']+)' place (\d+)"),
-                re.compile(r"JoinGame.+?jobId=([0-9a-f\-]+).+?placeId=(\d+)"),
-                re.compile(r"TeleportService:Teleport.+?([0-9a-f\-]+).+?(\d+)"),
-                re.compile(r"ServerInstance:\s*([0-9a-f\-]+).+?PlaceId:\s*(\d+)"),
-                
-                # Reversed order (PlaceID first, then JobID)
-                re.compile(r"Game \((\d+)/([0-9a-f\-]+)"),
-                re.compile(r"Connected to Game \((\d+)/([0-9a-f\-]+)"),
-                re.compile(r"Disconnected from Game \((\d+)/([0-9a-f\-]+)"),
-                re.compile(r"Teleporting to \((\d+)/([0-9a-f\-]+)"),
-                re.compile(r"placeId=(\d+).+?jobId=([0-9a-f\-]+)"),
-                
-                # General pattern to find UUID and PlaceID in the same line
-                re.compile(r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}).*?(\d{8,})")
-            ]
-            
-            match = None
-            pattern_used = None
-            job_id = None
-            place_id = None
-            
-            # Try each pattern until we find a match
-            for i, pattern in enumerate(patterns):
-                match = pattern.search(line)
-                if match:
-                    pattern_used = i + 1
-                    # Check pattern order - some patterns have reversed group order
-                    if i >= 4 and i <= 8:  # Reversed order patterns
-                        place_id = match.group(1)
-                        job_id = match.group(2)
-                    else:
-                        # Standard order: JobID first, then PlaceID
-                        job_id = match.group(1)
-                        place_id = match.group(2)
-                    break
-            
-            if job_id and place_id:
-                # Debug output
-                if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                    self.monitor_thread.update_status_signal.emit(
-                        f"Server match found with pattern {pattern_used}: JobID={job_id}, PlaceID={place_id}"
-                    )
-                
-                # Check if this is a new server
-                is_new_server = job_id != self.current_job_id
-                
-                # Print for debugging
-                print(f"[DEBUG] Detected server join: JobID={job_id}, PlaceID={place_id}, IsNew={is_new_server}")
-                
-                # Check if the timestamp is newer than our last server change
-                # If no timestamp provided, assume it's current
-                is_newer_timestamp = True
-                if line_timestamp and self.last_server_change_time:
-                    # Convert timestamp to string for safe comparison
-                    if isinstance(line_timestamp, datetime):
-                        line_timestamp_str = line_timestamp.isoformat()
-                    else:
-                        line_timestamp_str = str(line_timestamp)
-                        
-                    is_newer_timestamp = line_timestamp_str > self.last_server_change_time
-                
-                if is_new_server and is_newer_timestamp:
-                    # Update current server info
-                    old_job_id = self.current_job_id
-                    self.current_job_id = job_id
-                    self.current_place_id = place_id
-                    
-                    # Update timestamp of server change - store as string to avoid type comparison issues
-                    if isinstance(line_timestamp, datetime):
-                        self.last_server_change_time = line_timestamp.isoformat()
-                    elif line_timestamp:
-                        self.last_server_change_time = str(line_timestamp)
-                    else:
-                        self.last_server_change_time = datetime.now().isoformat()
-                    
-                    # Log the server detection
-                    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        self.monitor_thread.update_status_signal.emit(f"🎮 Detected server change: JobID {job_id}")
-                        
-                        # Only send webhook if using public server mode
-                        if self.app and hasattr(self.app, 'server_mode_combo') and \
-                           self.app.server_mode_combo.currentText() == "Public Server":
-                            
-                            # Get the RoPro link from the API
-                            server_link = ""
-                            try:
-                                import requests
-                                api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-                                response = requests.get(api_url, timeout=5)
-                                
-                                if response.status_code == 200 and response.text.strip().startswith("http"):
-                                    server_link = response.text.strip()
-                                else:
-                                    # Fallback to API URL
-                                    server_link = api_url
-                            except Exception as e:
-                                print(f"Error getting RoPro link: {e}")
-                                # Fallback to API URL
-                                server_link = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-                            
-                            # Customize message based on whether this is a new server or first detection
-                            title = "🌐 New Server Detected"
-                            message = f"Joined a new Bubble Gum Simulator server.\nJobID: `{job_id}`"
-                            
-                            if old_job_id:
-                                title = "🔄 Server Changed"
-                                message = f"Server has changed from {old_job_id[:8]}... to new server.\nNew JobID: `{job_id}`"
-                            
-                            self.monitor_thread.webhook_signal.emit(
-                                title,
-                                message,
-                                None,
-                                0x3498db,
-                                None
-                            )
-                            
-                            # Update the UI with the new server info
-                            if hasattr(self.app, 'server_status') and hasattr(self.app, 'pslink_entry'):
-                                truncated_id = job_id[:8] + "..." if len(job_id) > 8 else job_id
-                                self.app.server_status.setText(f"Current Server: {truncated_id}")
-                                if self.app.server_mode_combo.currentText() == "Public Server":
-                                    self.app.pslink_entry.setText(server_link)
-                    
-                    return job_id, place_id
-                elif is_new_server:
-                    # This is a new server but with an older timestamp
-                    if hasattr(self, 'monitor_thread') and self.monitor_thread:
-                        self.monitor_thread.update_status_signal.emit(
-                            f"Ignoring older server info: JobID={job_id} (timestamp not newer than last change)"
-                        )
-                
+            parsed = parsed or self.server_parser.parse(line)
+            if not parsed:
+                return None
+            kind, job_id, place_id = parsed.kind, parsed.job_id, parsed.place_id
+            # Teleport and disconnect lines name a server before it is confirmed; the session only tracks the state
+            if job_id and kind in ENTERING_KINDS and hasattr(self, 'monitor_thread') and self.monitor_thread:
+                self.monitor_thread.update_status_signal.emit(
+                    f"Server {kind} line matched {parsed.pattern}: JobID={job_id}, PlaceID={place_id}"
+                )
+
+            previous_job_id = self.server_session.feed(kind, job_id, place_id, line_timestamp)
+            if previous_job_id is None:
+                return None
+            self.announce_server_change(previous_job_id, job_id, place_id, line_timestamp)
+            return job_id, place_id
         except Exception as e:
             print(f"Error processing server join: {e}")
             if hasattr(self, 'monitor_thread') and self.monitor_thread:
                 self.monitor_thread.update_status_signal.emit(f"Error processing server join: {e}")
-                
         return None
-    
-    def get_server_link(self):
-        """Get the appropriate server link based on current settings"""
-        if self.app and hasattr(self.app, 'server_mode_combo'):
-            mode = self.app.server_mode_combo.currentText()
-            
-            if mode == "Private Server" and hasattr(self.app, 'pslink_entry'):
-                return self.app.pslink_entry.text().strip()
-            elif mode == "Public Server" and self.current_job_id:
-                # Check if we already have a ro.pro URL in the UI
-                if hasattr(self.app, 'pslink_entry'):
-                    current_link = self.app.pslink_entry.text().strip()
-                    if current_link and "ro.pro" in current_link:
-                        return current_link
-                
-                # Otherwise fetch from API
-                try:
-                    import requests
-                    api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={self.current_job_id}"
-                    response = requests.get(api_url, timeout=5)
-                    
-                    if response.status_code == 200 and response.text.strip().startswith("http"):
-                        return response.text.strip()
-                    
-                    # Fallback to API URL
-                    return api_url
-                except Exception as e:
-                    print(f"Error in get_server_link: {e}")
-                    # Fallback to API URL
-                    return f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={self.current_job_id}"
-                
-        return ""
-    
+
+    def report_server_line_formats(self):
+        """Log how often each server line format matched, which shows what the launcher writes"""
+        stats = self.server_parser.stats()
+        if not stats["hits"] and not stats["misses"]:
+            return
+        formats = ", ".join(f"{name}: {count}" for name, count in stats["hits"].items()) or "none"
+        message = f"Server line formats seen: {formats} ({stats['misses']} unrecognised)"
+        print(message)
+        if hasattr(self, 'monitor_thread') and self.monitor_thread:
+            self.monitor_thread.update_status_signal.emit(message)
+
+    def announce_server_change(self, old_job_id, job_id, place_id, line_timestamp=None):
+        """Log a server change and, in public server mode, send its webhook and show it in the UI"""
+        print(f"[DEBUG] Detected server change: JobID={job_id}, PlaceID={place_id}")
+        if not (hasattr(self, 'monitor_thread') and self.monitor_thread):
+            return
+        self.monitor_thread.update_status_signal.emit(f"🎮 Detected server change: JobID {job_id}")
+
+        # Only send webhook if using public server mode
+        if not self.settings.public_server:
+            return
+
+        # Look the invite link up in the background so the webhooks that follow find it cached;
+        # the API URL stands in until it arrives
+        server_link = invite_api_url(job_id)
+        if hasattr(self.app, 'link_resolver'):
+            server_link = self.app.link_resolver.cached(job_id) or server_link
+            self.app.link_resolver.prefetch(job_id, callback=self.app.server_link_resolved_signal.emit)
+
+        # Customize message based on whether this is a new server or first detection
+        title = "🌐 New Server Detected"
+        message = f"Joined a new Bubble Gum Simulator server.\nJobID: `{job_id}`"
+
+        if old_job_id:
+            title = "🔄 Server Changed"
+            message = f"Server has changed from {old_job_id[:8]}... to new server.\nNew JobID: `{job_id}`"
+
+        self.monitor_thread.webhook_signal.emit(
+            title,
+            message,
+            None,
+            0x3498db,
+            None,
+            PRIORITY_NORMAL,
+            EVENT_SERVER,
+            [],
+            self.detected_at(line_timestamp)
+        )
+
+        # Update the UI with the new server info
+        self.show_server(job_id, place_id, server_link)
+
     def process_hatch_match(self, match, current_time, line_timestamp=None, triggering_line=None):
         """Process a regex match for hatched pet"""
         print("[DEBUG] Regex match successful!") 
@@ -683,7 +968,7 @@ class RiftDetector:
         if is_secret or is_legendary:
             print(f"[DEBUG] Base Pet ('{base_pet_name}') is Secret or Legendary.")
 
-            target_username = self.app.hatch_username_entry.text().strip()
+            target_username = self.settings.hatch_username
             if target_username and hatched_username.lower() == target_username.lower():
                 print(f"[DEBUG] Username '{hatched_username}' matches target '{target_username}'. Proceeding...")
 
@@ -698,9 +983,9 @@ class RiftDetector:
                         self.monitor_thread.update_status_signal.emit(f"🎉 {pet_type} Pet Hatched by {hatched_username}: {pet_name} ({rarity})")
 
                         ping_content = None
-                        ping_user_id = self.app.hatch_userid_entry.text().strip()
+                        ping_user_id = self.settings.hatch_ping_user_id
 
-                        if is_secret and self.app.hatch_secret_ping_checkbox.isChecked() and ping_user_id:
+                        if is_secret and self.settings.hatch_secret_ping and ping_user_id:
                             ping_content = f"<@{ping_user_id}>"
 
                         try:
@@ -715,7 +1000,11 @@ class RiftDetector:
                             f"**Rarity:** {rarity}",
                             None,
                             embed_color,
-                            ping_content
+                            ping_content,
+                            PRIORITY_HIGH,
+                            EVENT_HATCH,
+                            [pet_type.lower()],
+                            self.detected_at(line_timestamp)
                         )
                         # Update last processed hatch line for this batch
                         self.current_batch_last_hatch_trigger_line = triggering_line
@@ -752,10 +1041,13 @@ class RiftDetector:
 
         found = False
         start_time = time.time()
+        test_watcher = LogWatcher()
+        test_watcher.watch(latest_log)
         while not found and time.time() - start_time < 20: 
             if not hasattr(self, 'app') or not self.app or not self.app.test_running:
                 if hasattr(self, 'test_worker') and self.test_worker:
                     self.test_worker.update_status_signal.emit("Test scan cancelled.")
+                test_watcher.close()
                 return False
 
             lines = read_last_n_lines(latest_log, n=50)
@@ -776,7 +1068,10 @@ class RiftDetector:
                     break
 
             if not found:
-                time.sleep(0.5)
+                remaining = 20 - (time.time() - start_time)
+                test_watcher.wait_for_change(timeout=max(0.0, min(1.0, remaining)))
+
+        test_watcher.close()
 
         if not found:
             if hasattr(self, 'test_worker') and self.test_worker:
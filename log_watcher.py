@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# RiftScope - Log File Change Notifications
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import os
+import time
+import errno
+import select
+import struct
+import platform
+import threading
+
+# inotify is only available on Linux; everything else uses adaptive polling
+HAS_INOTIFY = False
+if platform.system() == "Linux":
+    try:
+        import ctypes
+        import ctypes.util
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        HAS_INOTIFY = True
+    except (OSError, AttributeError):
+        HAS_INOTIFY = False
+
+# inotify constants (from <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+FILE_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Blocks on an inotify descriptor, with a pipe used to wake waiters early."""
+
+    def __init__(self):
+        self._fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._watches = {}  # path -> watch descriptor
+
+    def watch(self, paths):
+        for path in list(self._watches):
+            if path not in paths:
+                _libc.inotify_rm_watch(self._fd, self._watches.pop(path))
+
+        for path in paths:
+            if path in self._watches or not os.path.exists(path):
+                continue
+            mask = DIR_MASK if os.path.isdir(path) else FILE_MASK
+            wd = _libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+            if wd >= 0:
+                self._watches[path] = wd
+
+    def wait(self, timeout):
+        try:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        except InterruptedError:
+            return False
+        if not readable:
+            return False
+        if self._wake_r in readable:
+            self._drain(self._wake_r)
+        if self._fd in readable:
+            self._read_events()
+        return True
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._watches.clear()
+
+    def _read_events(self):
+        data = self._drain(self._fd)
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size + name_len
+            if mask & IN_IGNORED:
+                # The kernel dropped this watch (file deleted); re-add it on the next watch() call
+                for path, watched_wd in list(self._watches.items()):
+                    if watched_wd == wd:
+                        del self._watches[path]
+
+    @staticmethod
+    def _drain(fd):
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+class _PollingBackend:
+    """Stats the watched paths, backing off while nothing changes."""
+
+    def __init__(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._interval = min_interval
+        self._paths = []
+        self._signature = None
+        self._wake_event = threading.Event()
+
+    def watch(self, paths):
+        if paths != self._paths:
+            self._paths = list(paths)
+            self._signature = self._snapshot()
+            self._interval = self.min_interval
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signature = self._snapshot()
+            if signature != self._signature:
+                self._signature = signature
+                self._interval = self.min_interval
+                return True
+
+            sleep_for = self._interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                sleep_for = min(sleep_for, remaining)
+
+            if self._wake_event.wait(sleep_for):
+                self._wake_event.clear()
+                return True
+            self._interval = min(self._interval * 2, self.max_interval)
+
+    def wake(self):
+        self._wake_event.set()
+
+    def close(self):
+        self._paths = []
+
+    def _snapshot(self):
+        signature = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return signature
+
+
+class LogWatcher:
+    """Wait for a log file or log directory to change.
+
+    Uses inotify on Linux and adaptive stat polling elsewhere. Watched files
+    wake the waiter when written to; watched directories wake it when files are
+    created, deleted or renamed inside them.
+    """
+
+    def __init__(self, min_poll_interval=0.05, max_poll_interval=0.5):
+        self._backend = None
+        if HAS_INOTIFY:
+            try:
+                self._backend = _InotifyBackend()
+            except OSError as e:
+                print(f"inotify unavailable, falling back to polling: {e}")
+        if self._backend is None:
+            self._backend = _PollingBackend(min_poll_interval, max_poll_interval)
+        self._lock = threading.Lock()
+
+    @property
+    def uses_inotify(self):
+        return isinstance(self._backend, _InotifyBackend)
+
+    def watch(self, *paths):
+        """Set the files/directories to watch. Cheap to call repeatedly with the same paths."""
+        wanted = [os.path.abspath(p) for p in paths if p]
+        with self._lock:
+            self._backend.watch(wanted)
+
+    def wait_for_change(self, timeout=None):
+        """Block until a watched path changes, wake() is called, or timeout elapses.
+
+        Returns True if woken by a change or wake(), False on timeout.
+        """
+        return self._backend.wait(timeout)
+
+    def wake(self):
+        """Wake any thread blocked in wait_for_change (e.g. when stopping)."""
+        self._backend.wake()
+
+    def close(self):
+        with self._lock:
+            self._backend.close()
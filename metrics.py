@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# RiftScope - Delivery Metrics
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import bisect
+import json
+import os
+import threading
+import time
+from utils import APP_DATA_DIR, write_file_atomic
+
+STATS_FILE = os.path.join(APP_DATA_DIR, "webhook_stats.json")
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000, 3600000)
+SIZE_BUCKETS_BYTES = (256, 512, 1024, 2048, 4096, 16384, 65536, 262144, 1048576, 8388608)
+
+
+class Histogram:
+    """Fixed-bucket histogram: recording is a bisect and an increment, memory never grows.
+
+    Percentiles are estimated by interpolating inside the bucket they fall in,
+    so they are only as precise as the bucket bounds.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket catches everything above the top bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        value = max(value, 0.0)
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Estimated value below which fraction (0-1) of the samples fall, or None if empty"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class DeliveryMetrics:
+    """Counters and histograms for webhook notifications, shared by the dispatcher threads.
+
+    Every notification records when it was detected (the log line's timestamp),
+    when it was queued and when Discord answered, along with the HTTP status,
+    how many retries it took and how big the request was.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {"queued": 0, "delivered": 0, "failed": 0, "retried": 0, "dropped": 0, "rate_limited": 0,
+                         "bytes_sent": 0, "posts_saved": 0}  # posts_saved: POSTs avoided by merging embeds
+        self.status_codes = {}
+        self.retries = Histogram((0, 1, 2, 3, 5, 10))
+        self.payload_bytes = Histogram(SIZE_BUCKETS_BYTES)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)  # queued -> first byte sent
+        self.enqueue_to_delivery_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.detection_to_delivery_ms = Histogram(LATENCY_BUCKETS_MS)  # log line -> Discord accepted
+        self.by_priority = {}  # priority -> detection-to-delivery Histogram
+
+    def record_queued(self, count=1):
+        with self._lock:
+            self.counters["queued"] += count
+
+    def record_dropped(self, count=1):
+        with self._lock:
+            self.counters["dropped"] += count
+
+    def record_posts_saved(self, count):
+        with self._lock:
+            self.counters["posts_saved"] += count
+
+    def record_attempt(self, job, will_retry):
+        """Account for one finished send attempt of job (which may carry several merged parts)"""
+        with self._lock:
+            if job.status_code is not None:
+                key = str(job.status_code)
+                self.status_codes[key] = self.status_codes.get(key, 0) + 1
+            self.counters["rate_limited"] += job.rate_limit_retries
+            self.counters["bytes_sent"] += job.request_bytes
+            self.payload_bytes.record(job.request_bytes)
+            if will_retry:
+                self.counters["retried"] += len(job.parts)
+                return
+            outcome = "delivered" if job.success else "failed"
+            self.counters[outcome] += len(job.parts)
+            for part in job.parts:
+                self.retries.record(part.attempts + job.rate_limit_retries)
+                if job.started_at is not None and part.attempts == 0:
+                    self.queue_wait_ms.record((job.started_at - part.created) * 1000)
+                if not job.success:
+                    continue
+                self.enqueue_to_delivery_ms.record((job.completed_at - part.created) * 1000)
+                latency_ms = (job.completed_at - part.detected_at) * 1000
+                self.detection_to_delivery_ms.record(latency_ms)
+                histogram = self.by_priority.get(part.priority)
+                if histogram is None:
+                    histogram = self.by_priority[part.priority] = Histogram(LATENCY_BUCKETS_MS)
+                histogram.record(latency_ms)
+
+    def snapshot(self):
+        """All metrics as plain data, suitable for JSON"""
+        with self._lock:
+            return {
+                "since": self.started,
+                "uptime_seconds": time.time() - self.started,
+                "counters": dict(self.counters),
+                "status_codes": dict(self.status_codes),
+                "retries": self.retries.to_dict(),
+                "payload_bytes": self.payload_bytes.to_dict(),
+                "queue_wait_ms": self.queue_wait_ms.to_dict(),
+                "enqueue_to_delivery_ms": self.enqueue_to_delivery_ms.to_dict(),
+                "detection_to_delivery_ms": self.detection_to_delivery_ms.to_dict(),
+                "detection_to_delivery_ms_by_priority": {
+                    priority: histogram.to_dict() for priority, histogram in self.by_priority.items()
+                },
+            }
+
+    def summary(self):
+        """A few lines for the Logs tab"""
+        stats = self.snapshot()
+        counters = stats["counters"]
+
+        def latency(histogram):
+            if not histogram["count"]:
+                return "n/a"
+            return f"p50 {histogram['p50']:.0f} ms, p99 {histogram['p99']:.0f} ms, max {histogram['max']:.0f} ms"
+
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(stats["status_codes"].items())) or "none"
+        lines = [
+            f"Notifications: {counters['delivered']} delivered, {counters['failed']} failed, "
+            f"{counters['retried']} retried, {counters['dropped']} dropped ({counters['queued']} queued)",
+            f"Log line to Discord: {latency(stats['detection_to_delivery_ms'])}",
+            f"Queue to Discord: {latency(stats['enqueue_to_delivery_ms'])}",
+        ]
+        for priority, histogram in sorted(stats["detection_to_delivery_ms_by_priority"].items()):
+            lines.append(f"  {priority}: {latency(histogram)}")
+        lines.append(f"HTTP status codes: {codes} ({counters['rate_limited']} rate limited)")
+        lines.append(f"Sent {counters['bytes_sent'] / 1024:.1f} KB, {counters['posts_saved']} POSTs saved by batching")
+        return "\n".join(lines)
+
+    def dump(self, path=STATS_FILE):
+        """Write the snapshot as JSON to path and return the path"""
+        write_file_atomic(path, json.dumps(self.snapshot(), indent=4).encode("utf-8"))
+        return path
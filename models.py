@@ -9,10 +9,11 @@ import time
 import threading
 import queue
 import re
-import os # For path joining in CurrencyScreenshotWorker
 from datetime import datetime
 from enum import Enum
-from utils import read_log_file, find_log_path, get_latest_log_file, log_message, APP_DATA_DIR # Added APP_DATA_DIR
+from utils import read_log_file, find_log_path, get_latest_log_file, log_message
+from log_watcher import LogWatcher
+from screenshots import screenshot_settings, frame_signature, frame_difference
 
 # Attempt to import Pillow (PIL) for screenshots
 try:
@@ -25,7 +26,7 @@ except ImportError:
 class Worker(QThread):
     update_status_signal = pyqtSignal(str)
     finished_signal = pyqtSignal()
-    webhook_signal = pyqtSignal(str, str, str, int, str)
+    webhook_signal = pyqtSignal(str, str, str, int, str, str, str, list, float)  # title, description, image_url, color, ping, priority, event, tags, detected_at
 
     def __init__(self, func, *args, **kwargs):
         super().__init__()
@@ -193,7 +194,8 @@ class LogMonitorWorker(threading.Thread):
         self.last_position = 0
         self.log_file = None
         self.log_dir = None
-        self.check_interval = 0.5  # Check logs every 0.5 seconds
+        self.check_interval = 5.0  # Longest wait between checks; the watcher wakes us on log writes
+        self.watcher = LogWatcher()
         
         # Compile regex patterns for faster matching
         self.rift_pattern = re.compile(r"(?i)rift.*appeared|spawned", re.IGNORECASE)
@@ -220,6 +222,8 @@ class LogMonitorWorker(threading.Thread):
                     time.sleep(5)
                     continue
                     
+                self.watcher.watch(self.log_file, self.log_dir)
+
                 # Read new content from the log file
                 new_content, self.last_position = read_log_file(self.log_file, self.last_position)
                 
@@ -227,8 +231,8 @@ class LogMonitorWorker(threading.Thread):
                 if new_content:
                     self.process_log_content(new_content)
                     
-                # Wait before checking again
-                time.sleep(self.check_interval)
+                # Wait until the log changes before checking again
+                self.watcher.wait_for_change(timeout=self.check_interval)
                 
             except Exception as e:
                 log_message(f"Error in log monitor: {str(e)}", "ERROR")
@@ -260,6 +264,7 @@ class LogMonitorWorker(threading.Thread):
     def stop(self):
         """Stop the worker thread."""
         self.running = False
+        self.watcher.wake()
         
 class CollectionPathPoint:
     """Data class representing a point in a collection path."""
@@ -293,18 +298,19 @@ class CollectionPathPoint:
 
 class CurrencyScreenshotWorker(QThread):
     update_status_signal = pyqtSignal(str)
-    send_webhook_signal = pyqtSignal(str, str, str, int, str, str) # title, desc, image_url, color, ping, file_path
+    send_webhook_signal = pyqtSignal(str, str, int, object) # title, desc, color, EncodedImage (None for a heartbeat)
 
     def __init__(self, app_instance):
         super().__init__()
         self.app = app_instance
         self._is_running = False
+        # (block hash, capture time) of the last capture that was encoded and queued for upload.
+        # Set and cleared as one tuple so run() never sees the hash of one capture with the time of another
+        self._last_sent = None
 
     def run(self):
         self._is_running = True
         self.update_status_signal.emit("💰 Currency Screenshot Worker started.")
-        # screenshots_dir = os.path.join(APP_DATA_DIR, "Screenshots") # Old path
-        # os.makedirs(screenshots_dir, exist_ok=True) # Ensure main APP_DATA_DIR is created by config/utils
 
         while self._is_running:
             if not self.app.running: # If main scanning/app is stopped, worker should stop
@@ -346,22 +352,25 @@ class CurrencyScreenshotWorker(QThread):
                 bbox = (area_coords[0], area_coords[1], area_coords[2], area_coords[3])
                 screenshot = ImageGrab.grab(bbox=bbox)
                 
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"currency_{timestamp}.png"
-                # filepath = os.path.join(screenshots_dir, filename) # Old path
-                filepath = os.path.join(APP_DATA_DIR, filename) # New path: directly in APP_DATA_DIR
-                screenshot.save(filepath, "PNG")
-                self.update_status_signal.emit(f"💰 Screenshot saved to {filepath}")
-
-                # Emit signal to send webhook with the file
-                self.send_webhook_signal.emit(
-                    "💰 Currency Update",
-                    f"Current currency status at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                    None, # No separate image_url, the file is the image
-                    0xfee75c, # Yellowish color
-                    None, # No ping content for now, can be added later if needed
-                    filepath # Pass the filepath of the screenshot
-                )
+                captured_at = datetime.now()
+
+                # Skip the upload if the display hasn't visibly changed since the last one
+                # forget_last_sent() may clear _last_sent from the GUI thread at any time
+                last_signature, last_time = self._last_sent or (None, None)
+                signature = frame_signature(screenshot)
+                difference = frame_difference(last_signature, signature)
+                threshold = self.app.config.currency_change_threshold
+                if threshold and last_time is not None and difference < threshold:
+                    self.update_status_signal.emit(
+                        f"💰 Currency display unchanged (difference {difference:.1f} < {threshold}), sending heartbeat.")
+                    self.send_webhook_signal.emit(
+                        "💰 Currency Unchanged",
+                        f"No change since the screenshot at {last_time.strftime('%Y-%m-%d %H:%M:%S')}",
+                        0xfee75c,
+                        None
+                    )
+                else:
+                    self._send_screenshot(screenshot, captured_at, signature)
             except Exception as e:
                 self.update_status_signal.emit(f"❌ Error taking/sending currency screenshot: {str(e)}")
                 # Log to main console as well for more visibility during errors
@@ -380,6 +389,31 @@ class CurrencyScreenshotWorker(QThread):
         
         self.update_status_signal.emit("💰 Currency Screenshot Worker stopped.")
 
+    def _send_screenshot(self, screenshot, captured_at, signature):
+        name = f"currency_{captured_at.strftime('%Y%m%d_%H%M%S')}"
+        description = f"Current currency status at {captured_at.strftime('%Y-%m-%d %H:%M:%S')}"
+
+        # Encoded in memory on the encoder thread; nothing is written to disk
+        self.app.screenshot_encoder.submit(
+            screenshot, name, screenshot_settings(self.app.config),
+            lambda encoded, error: self._on_encoded(encoded, error, description, signature, captured_at)
+        )
+
+    def _on_encoded(self, encoded, error, description, signature, captured_at):
+        """Runs on the encoder thread once a capture has been encoded"""
+        if error is not None:
+            self.update_status_signal.emit(f"❌ Error encoding currency screenshot: {error}")
+            print(f"[CurrencyScreenshotWorker] Error: {error}")
+            return
+        # Only now does this capture become the one later frames are compared against
+        self._last_sent = (signature, captured_at)
+        self.update_status_signal.emit(f"💰 Screenshot encoded: {encoded.savings_message()}")
+        self.send_webhook_signal.emit("💰 Currency Update", description, 0xfee75c, encoded)
+
+    def forget_last_sent(self):
+        """Treat the next capture as changed, e.g. because the last upload was dropped"""
+        self._last_sent = None
+
     def stop(self):
         self.update_status_signal.emit("💰 Requesting Currency Screenshot Worker to stop...")
         self._is_running = False 
\ No newline at end of file
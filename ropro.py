@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# RiftScope - RoPro Invite Links
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import time
+import threading
+import requests
+
+ROPRO_INVITE_URL = "https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
+
+
+def invite_api_url(job_id):
+    """The RoPro API URL for a public server, also used as the link when the lookup fails."""
+    return ROPRO_INVITE_URL.format(job_id=job_id)
+
+
+class _Lookup:
+    """An in-progress lookup that other callers for the same job id can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.link = None
+        self.resolved = False
+        self.callbacks = []
+
+
+class RoProLinkResolver:
+    """Turns public server job ids into short ro.pro invite links.
+
+    Successful lookups are cached per job id for ttl seconds. Concurrent requests
+    for the same job id share one upstream call. Failures are cached too, backing
+    off from failure_backoff[0] to failure_backoff[1] seconds, so a RoPro outage
+    doesn't add a timeout to every notification. Lookups run on background
+    threads; prefetch() starts one as soon as a server change is seen.
+    """
+
+    def __init__(self, ttl=30 * 60, failure_backoff=(5.0, 300.0), request_timeout=5, session=None):
+        self.ttl = ttl
+        self.failure_backoff = failure_backoff
+        self.request_timeout = request_timeout
+        self.upstream_calls = 0
+        self._session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._links = {}  # job id -> (link, expires_at)
+        self._failures = {}  # job id -> (failure count, retry_at)
+        self._lookups = {}  # job id -> _Lookup in progress
+
+    def cached(self, job_id):
+        """Return the cached invite link for job_id, or None. Never blocks."""
+        with self._lock:
+            entry = self._links.get(job_id)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def prefetch(self, job_id, callback=None):
+        """Start looking up job_id in the background.
+
+        callback(job_id, link) is called once a short link is known, straight away
+        if it is already cached. It runs on the lookup thread.
+        """
+        self._start(job_id, callback)
+
+    def resolve(self, job_id, timeout=None):
+        """Return (link, resolved) for job_id, waiting at most timeout seconds for the lookup.
+
+        resolved is False when the short link isn't available (yet), in which case
+        link is the RoPro API URL. timeout=0 never waits.
+        """
+        lookup = self._start(job_id)
+        if lookup is None:
+            link = self.cached(job_id)
+            return (link, True) if link else (invite_api_url(job_id), False)
+        if timeout != 0 and lookup.done.wait(timeout):
+            return lookup.link, lookup.resolved
+        return invite_api_url(job_id), False
+
+    def _start(self, job_id, callback=None):
+        """Begin a lookup unless one is cached, running, or backing off. Returns the running lookup."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._links.get(job_id)
+            if entry and entry[1] > now:
+                link = entry[0]
+            else:
+                link = None
+                lookup = self._lookups.get(job_id)
+                if lookup is None:
+                    failure = self._failures.get(job_id)
+                    if failure and failure[1] > now:
+                        return None
+                    lookup = _Lookup()
+                    self._lookups[job_id] = lookup
+                    threading.Thread(target=self._run_lookup, args=(job_id, lookup),
+                                     name="RiftScopeRoProLookup", daemon=True).start()
+                if callback:
+                    lookup.callbacks.append(callback)
+                return lookup
+        if callback:
+            callback(job_id, link)
+        return None
+
+    def _run_lookup(self, job_id, lookup):
+        api_url = invite_api_url(job_id)
+        link = None
+        with self._lock:
+            self.upstream_calls += 1
+        try:
+            response = self._session.get(api_url, timeout=self.request_timeout)
+            if response.status_code == 200 and response.text.strip().startswith("http"):
+                link = response.text.strip()
+            else:
+                print(f"RoPro API returned status {response.status_code} for {job_id[:8]}...")
+        except requests.exceptions.RequestException as e:
+            print(f"Error getting RoPro link: {e}")
+
+        with self._lock:
+            now = time.monotonic()
+            if link:
+                self._links[job_id] = (link, now + self.ttl)
+                self._failures.pop(job_id, None)
+            else:
+                count = self._failures.get(job_id, (0, 0))[0] + 1
+                delay = min(self.failure_backoff[0] * 2 ** (count - 1), self.failure_backoff[1])
+                self._failures[job_id] = (count, now + delay)
+            self._prune(now)
+            del self._lookups[job_id]
+
+        lookup.link = link or api_url
+        lookup.resolved = link is not None
+        lookup.done.set()
+        if link:
+            for callback in lookup.callbacks:
+                try:
+                    callback(job_id, link)
+                except Exception as e:
+                    print(f"Error in RoPro link callback: {e}")
+
+    def _prune(self, now):
+        """Drop expired entries so the caches don't grow for the life of the app"""
+        for job_id in [j for j, (_, expires_at) in self._links.items() if expires_at <= now]:
+            del self._links[job_id]
+        for job_id in [j for j, (_, retry_at) in self._failures.items() if retry_at + self.ttl <= now]:
+            del self._failures[job_id]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# RiftScope - Screenshot Encoding
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Attempt to import Pillow (PIL) for encoding
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# NumPy is optional; without it every capture is treated as changed
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Side of the square pixel blocks averaged by frame_signature()
+SIGNATURE_BLOCK_SIZE = 8
+
+# Supported upload formats: name -> (file extension, content type)
+SCREENSHOT_FORMATS = {
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg"),
+}
+
+
+class EncodedImage:
+    """A screenshot encoded in memory, ready to be attached to a webhook."""
+
+    def __init__(self, filename, data, content_type, baseline_size=None):
+        self.filename = filename
+        self.data = data
+        self.content_type = content_type
+        # Size the same capture would have had as a plain PNG, for reporting savings
+        self.baseline_size = baseline_size
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def savings_message(self):
+        if not self.baseline_size:
+            return f"{self.filename}: {self.size / 1024:.1f} KB"
+        saved = self.baseline_size - self.size
+        return (f"{self.filename}: {self.size / 1024:.1f} KB "
+                f"(plain PNG {self.baseline_size / 1024:.1f} KB, saved {saved / 1024:.1f} KB)")
+
+
+def screenshot_settings(config):
+    """(format, quality, max_dimension) from the app config, with safe fallbacks"""
+    fmt = str(getattr(config, 'screenshot_format', "PNG") or "PNG").upper()
+    if fmt not in SCREENSHOT_FORMATS:
+        fmt = "PNG"
+    try:
+        quality = min(max(int(getattr(config, 'screenshot_quality', 80)), 1), 100)
+    except (TypeError, ValueError):
+        quality = 80
+    try:
+        max_dimension = max(int(getattr(config, 'screenshot_max_dimension', 0) or 0), 0)
+    except (TypeError, ValueError):
+        max_dimension = 0
+    return fmt, quality, max_dimension
+
+
+def frame_signature(image, block_size=SIGNATURE_BLOCK_SIZE):
+    """Block hash of a capture: the mean grey level of each block_size x block_size block.
+
+    Averaging over blocks smooths out pixel noise while a changed digit still
+    moves the blocks it covers by a lot. Returns None if NumPy isn't available.
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    pixels = np.asarray(image.convert("L"), dtype=np.float32)
+    rows = pixels.shape[0] // block_size
+    cols = pixels.shape[1] // block_size
+    if rows == 0 or cols == 0:
+        return pixels
+    pixels = pixels[:rows * block_size, :cols * block_size]
+    return pixels.reshape(rows, block_size, cols, block_size).mean(axis=(1, 3))
+
+
+def frame_difference(previous, current):
+    """Largest change in any block's mean between two signatures (0-255).
+
+    Returns infinity if either signature is missing or the capture size changed.
+    """
+    if previous is None or current is None or previous.shape != current.shape:
+        return float("inf")
+    return float(np.abs(current - previous).max())
+
+
+def encode_image(image, name, fmt="PNG", quality=80, max_dimension=0, measure_baseline=False):
+    """Encode a PIL image into an EncodedImage without touching the disk.
+
+    PNG is written with optimize=True; WEBP and JPEG use quality (1-100). If
+    max_dimension is set, the image is first scaled down so that neither side
+    is longer than it. measure_baseline also encodes a plain PNG just to report
+    the savings, which doubles the work, so it is off unless asked for.
+    """
+    extension, content_type = SCREENSHOT_FORMATS[fmt]
+
+    baseline_size = None
+    if measure_baseline:
+        baseline = io.BytesIO()
+        image.save(baseline, "PNG")
+        baseline_size = baseline.tell()
+
+    if max_dimension and max(image.size) > max_dimension:
+        image = image.copy()
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    if fmt == "PNG":
+        image.save(buffer, "PNG", optimize=True)
+    elif fmt == "WEBP":
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=quality, optimize=True)
+    return EncodedImage(f"{name}.{extension}", buffer.getvalue(), content_type, baseline_size)
+
+
+class ScreenshotEncoder:
+    """Encodes captures on a single background thread so callers can get back to work.
+
+    submit() returns immediately; callback(encoded, error) runs on the encoder
+    thread with either the EncodedImage or the exception that stopped it.
+    """
+
+    def __init__(self, measure_baseline=False):
+        self.measure_baseline = measure_baseline  # See encode_image()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, image, name, settings, callback):
+        fmt, quality, max_dimension = settings
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RiftScopeEncoder")
+            executor = self._executor
+        return executor.submit(self._encode, image, name, fmt, quality, max_dimension, callback)
+
+    def _encode(self, image, name, fmt, quality, max_dimension, callback):
+        try:
+            encoded = encode_image(image, name, fmt, quality, max_dimension, self.measure_baseline)
+        except Exception as e:
+            callback(None, e)
+            return
+        callback(encoded, None)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
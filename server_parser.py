@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# RiftScope - Server Line Parsing
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import re
+import collections
+from server_session import LINE_CONNECT, LINE_DISCONNECT, LINE_JOIN, LINE_TELEPORT
+
+# Roblox job ids are UUIDs; requiring the full shape keeps stray hex out
+_JOB = r"(?P<job>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})"
+_PLACE = r"(?P<place>\d+)"
+
+# (name, kind, literal that must appear in the line, pattern), most specific first.
+# Every pattern uses the named groups job and place, so no pattern needs to know
+# which order the ids appear in.
+SERVER_LINE_PATTERNS = (
+    ("joining_game", LINE_JOIN, "Joining game", rf"Joining game '{_JOB}' place {_PLACE}"),
+    ("join_game_job_first", LINE_JOIN, "JoinGame", rf"JoinGame.+?jobId={_JOB}.+?placeId={_PLACE}"),
+    ("join_game_place_first", LINE_JOIN, "JoinGame", rf"JoinGame.+?placeId={_PLACE}.+?jobId={_JOB}"),
+    ("server_instance", LINE_CONNECT, "ServerInstance", rf"ServerInstance:\s*{_JOB}.+?PlaceId:\s*{_PLACE}"),
+    ("connected_to_game", LINE_CONNECT, "Connected to Game (", rf"Connected to Game \({_PLACE}/{_JOB}"),
+    ("disconnected_from_game", LINE_DISCONNECT, "Disconnected from Game (", rf"Disconnected from Game \({_PLACE}/{_JOB}"),
+    ("teleporting_to", LINE_TELEPORT, "Teleporting to (", rf"Teleporting to \({_PLACE}/{_JOB}"),
+    ("teleport_service", LINE_TELEPORT, "TeleportService:Teleport", r"TeleportService:Teleport"),
+    ("game", LINE_CONNECT, "Game (", rf"Game \({_PLACE}/{_JOB}"),
+)
+
+# Literals that mark a line as worth parsing (also the detector's server triggers)
+SERVER_LINE_KEYWORDS = tuple(dict.fromkeys(literal for _, _, literal, _ in SERVER_LINE_PATTERNS))
+
+ServerLine = collections.namedtuple("ServerLine", "kind job_id place_id pattern")
+
+
+class ServerLineParser:
+    """Recognises server join/connect/teleport/disconnect lines from every launcher's logs.
+
+    One search for the keyword literals rejects ordinary lines; only patterns
+    whose literal is in the line are then tried, in order. hits counts matches
+    per pattern name, which shows which log format is in use.
+    """
+
+    def __init__(self, patterns=SERVER_LINE_PATTERNS):
+        self._patterns = [(name, kind, literal, re.compile(pattern)) for name, kind, literal, pattern in patterns]
+        literals = sorted({literal for _, _, literal, _ in self._patterns}, key=len, reverse=True)
+        self._prefilter = re.compile("|".join(re.escape(literal) for literal in literals))
+        self.hits = collections.Counter()
+        self.misses = 0  # Lines with a keyword that no pattern matched
+
+    def parse(self, line):
+        """Return a ServerLine for line, or None if it isn't a server line.
+
+        job_id and place_id are None for lines that only mark a step, such as
+        TeleportService:Teleport.
+        """
+        if not self._prefilter.search(line):
+            return None
+        for name, kind, literal, pattern in self._patterns:
+            if literal not in line:
+                continue
+            match = pattern.search(line)
+            if match:
+                self.hits[name] += 1
+                groups = match.groupdict()
+                return ServerLine(kind, groups.get("job"), groups.get("place"), name)
+        self.misses += 1
+        return None
+
+    def stats(self):
+        """Hit count per pattern (most used first) and the number of keyword lines nothing matched"""
+        return {"hits": dict(self.hits.most_common()), "misses": self.misses}
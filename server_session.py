@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# RiftScope - Server Session Tracking
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import time
+
+# Kinds of server lines, in the order a server hop normally logs them
+LINE_TELEPORT = "teleport"  # TeleportService:Teleport / Teleporting to (...)
+LINE_DISCONNECT = "disconnect"  # Disconnected from Game (...)
+LINE_JOIN = "join"  # Joining game '...' place ... / JoinGame ...
+LINE_CONNECT = "connect"  # Connected to Game (...) / ServerInstance: ...
+
+# Session states
+STATE_UNKNOWN = "unknown"
+STATE_JOINING = "joining"
+STATE_CONNECTED = "connected"
+STATE_TELEPORTING = "teleporting"
+STATE_DISCONNECTED = "disconnected"
+
+_STATE_AFTER = {
+    LINE_TELEPORT: STATE_TELEPORTING,
+    LINE_DISCONNECT: STATE_DISCONNECTED,
+    LINE_JOIN: STATE_JOINING,
+    LINE_CONNECT: STATE_CONNECTED,
+}
+
+# Lines that say which server the player is entering (as opposed to leaving)
+ENTERING_KINDS = (LINE_JOIN, LINE_CONNECT)
+
+
+class ServerSession:
+    """Follows which server the player is in from server lines as they are appended to the log.
+
+    feed() is called once per server line, in file order. Join and connect lines
+    for a job id other than the current one are a server change; teleport and
+    disconnect lines only move the state along, since they name the server being
+    left. Lines older than the last change (e.g. replayed after a restart) are
+    ignored.
+    """
+
+    def __init__(self):
+        self.state = STATE_UNKNOWN
+        self.job_id = None
+        self.place_id = None
+        self.changed_at = None  # Epoch seconds of the line that started the current session
+        self.changes = 0
+
+    def restore(self, job_id, place_id=None, changed_at=None):
+        """Resume a session known from elsewhere (a checkpoint or a backwards scan of the log)"""
+        self.job_id = job_id
+        self.place_id = place_id
+        self.changed_at = changed_at
+        self.state = STATE_CONNECTED if job_id else STATE_UNKNOWN
+
+    def feed(self, kind, job_id=None, place_id=None, timestamp=None):
+        """Apply one server line. Returns the previous job id (or "") if the server changed, else None."""
+        if timestamp and self.changed_at and timestamp <= self.changed_at:
+            return None
+        self.state = _STATE_AFTER.get(kind, self.state)
+        if kind not in ENTERING_KINDS or not job_id:
+            return None
+        if job_id == self.job_id:
+            if place_id:
+                self.place_id = place_id
+            return None
+
+        previous = self.job_id or ""
+        self.job_id = job_id
+        self.place_id = place_id
+        self.changed_at = timestamp or time.time()
+        self.changes += 1
+        return previous
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import StubWebhookServer  # noqa: E402
+
+
+@pytest.fixture
+def stub_server():
+    server = StubWebhookServer()
+    yield server
+    server.close()
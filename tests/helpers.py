@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubRequest:
+    def __init__(self, path, headers, body):
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.received = time.time()
+
+    def json(self):
+        if self.headers.get("Content-Type", "").startswith("multipart/"):
+            # Screenshot uploads send the message as the payload_json form field
+            start = self.body.index(b"{", self.body.index(b'name="payload_json"'))
+            end = self.body.index(b"\r\n--", start)
+            return json.loads(self.body[start:end])
+        return json.loads(self.body or b"{}")
+
+    def titles(self):
+        return [embed.get("title") for embed in self.json().get("embeds", [])]
+
+
+class StubWebhookServer:
+    """Local stand-in for a Discord webhook (or any HTTP API) on 127.0.0.1.
+
+    respond(request) decides the answer and returns (status, headers, body);
+    by default every request gets 204. Requests are recorded in requests.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda request: (204, {}, b"")
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = StubRequest(self.path, dict(self.headers), self.rfile.read(length))
+                with stub._lock:
+                    stub.requests.append(request)
+                status, headers, body = stub.respond(request)
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up (or was killed) while waiting
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def wait_until(condition, timeout=10.0, interval=0.01):
+    """Poll condition() until it is true; returns its last value"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result or time.monotonic() > deadline:
+            return result
+        time.sleep(interval)
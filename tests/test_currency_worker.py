@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+pytest.importorskip("PIL.ImageGrab")
+pytest.importorskip("numpy")
+
+from PyQt6.QtCore import Qt  # noqa: E402
+from PIL import Image  # noqa: E402
+import models  # noqa: E402
+from models import CurrencyScreenshotWorker  # noqa: E402
+
+
+class Config:
+    currency_updates_enabled = True
+    currency_updates_delay_minutes = 1
+    currency_display_area_coords = (0, 0, 64, 32)
+    currency_change_threshold = 12
+
+
+class App:
+    running = True
+    config = Config()
+
+
+def run_once(worker, monkeypatch):
+    """Runs one capture of the worker loop, stopping it at the first sleep"""
+    monkeypatch.setattr(models.ImageGrab, "grab", lambda bbox: Image.new("RGB", (64, 32), (40, 40, 40)))
+    monkeypatch.setattr(models.time, "sleep", lambda seconds: worker.stop())
+    worker.run()
+
+
+def connect(worker):
+    sent = []
+    # Direct, since the test has no Qt event loop to deliver queued signals
+    worker.send_webhook_signal.connect(lambda title, description, color, attachment: sent.append((title, description)),
+                                       Qt.ConnectionType.DirectConnection)
+    return sent
+
+
+def test_unchanged_display_sends_a_heartbeat_with_the_last_upload_time(monkeypatch):
+    worker = CurrencyScreenshotWorker(App())
+    sent = connect(worker)
+    signature = models.frame_signature(Image.new("RGB", (64, 32), (40, 40, 40)))
+    worker._last_sent = (signature, datetime(2026, 1, 2, 3, 4, 5))
+    run_once(worker, monkeypatch)
+    assert sent == [("💰 Currency Unchanged", "No change since the screenshot at 2026-01-02 03:04:05")]
+
+
+def test_forget_last_sent_during_the_comparison_is_safe(monkeypatch):
+    worker = CurrencyScreenshotWorker(App())
+    sent = connect(worker)
+    signature = models.frame_signature(Image.new("RGB", (64, 32), (40, 40, 40)))
+    worker._last_sent = (signature, datetime(2026, 1, 2, 3, 4, 5))
+    real_difference = models.frame_difference
+
+    def difference_then_forget(previous, current):
+        # The GUI thread drops the last upload between the comparison and the heartbeat
+        worker.forget_last_sent()
+        return real_difference(previous, current)
+
+    monkeypatch.setattr(models, "frame_difference", difference_then_forget)
+    run_once(worker, monkeypatch)
+    assert sent == [("💰 Currency Unchanged", "No change since the screenshot at 2026-01-02 03:04:05")]
+    assert worker._last_sent is None  # The next capture is sent in full
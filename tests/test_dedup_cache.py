@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+import utils
+from utils import DedupCache
+
+REPLAY_LINES = 1_000_000
+CHUNK = 1000  # Lines per poll
+OVERLAP = 200  # Lines of the previous poll read again (e.g. after a restart or log reopen)
+
+
+def log_line(number):
+    return f"2026-10-17T10:{number // 60000 % 60:02d}:{number // 1000 % 60:02d}.{number % 1000:03d}Z,1.0,1a2c,6 " \
+           f"[FLog::Output] line {number}"
+
+
+def test_replay_notifies_every_line_exactly_once():
+    cache = DedupCache(capacity=4096)
+    notified = 0
+    duplicates = 0
+    seen = set()
+    for start in range(0, REPLAY_LINES, CHUNK):
+        for number in range(max(start - OVERLAP, 0), min(start + CHUNK, REPLAY_LINES)):
+            if cache.add(DedupCache.key_for(log_line(number))):
+                notified += 1
+                if number in seen:
+                    duplicates += 1
+                seen.add(number)
+    assert duplicates == 0
+    assert notified == REPLAY_LINES  # Nothing missed either
+    assert len(cache) == 4096
+
+
+def test_eviction_is_oldest_first():
+    cache = DedupCache(capacity=3)
+    for key in (1, 2, 3):
+        assert cache.add(key)
+    assert not cache.add(1)  # Re-adding doesn't refresh its age
+    assert cache.add(4)
+    assert 1 not in cache
+    assert list(cache.keys()) == [2, 3, 4]
+    assert cache.add(5)
+    assert list(cache.keys()) == [3, 4, 5]
+
+
+def test_key_is_stable_across_runs():
+    # Saved keys are only useful after a restart if they don't depend on hash() randomisation
+    code = "from utils import DedupCache; print(DedupCache.key_for('hello'))"
+    repo_root = os.path.dirname(os.path.abspath(utils.__file__))
+    runs = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                           env=dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=repo_root)).stdout.split()[-1]
+            for seed in ("1", "2")}
+    assert runs == {str(DedupCache.key_for("hello"))}
+    assert 0 <= DedupCache.key_for("hello") < 2 ** 64
+    assert DedupCache.key_for("hello") != DedupCache.key_for("hello!")
+
+
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / "seen_lines.bin"
+    cache = DedupCache(capacity=4)
+    for key in range(1, 7):
+        cache.add(key)
+    cache.save(str(path))
+
+    restored = DedupCache(capacity=4)
+    assert restored.load(str(path))
+    assert list(restored.keys()) == [3, 4, 5, 6]
+    assert not restored.add(6)
+    assert restored.add(7)
+    assert list(restored.keys()) == [4, 5, 6, 7]
+
+
+def test_load_into_smaller_cache_keeps_newest(tmp_path):
+    path = tmp_path / "seen_lines.bin"
+    cache = DedupCache(capacity=8)
+    for key in range(1, 9):
+        cache.add(key)
+    cache.save(str(path))
+
+    restored = DedupCache(capacity=3)
+    assert restored.load(str(path))
+    assert list(restored.keys()) == [6, 7, 8]
+
+
+def test_load_rejects_missing_or_foreign_files(tmp_path):
+    cache = DedupCache(capacity=4)
+    cache.add(1)
+    assert not cache.load(str(tmp_path / "missing.bin"))
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b"not a dedup cache")
+    assert not cache.load(str(foreign))
+    assert 1 in cache  # Contents are untouched
@@ -0,0 +1,87 @@
+import statistics
+import threading
+import time
+
+import pytest
+
+import log_watcher
+from log_watcher import LogWatcher
+
+TRIALS = 10
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, monkeypatch):
+    if request.param == "inotify" and not log_watcher.HAS_INOTIFY:
+        pytest.skip("inotify is only available on Linux")
+    if request.param == "polling":
+        monkeypatch.setattr(log_watcher, "HAS_INOTIFY", False)
+    watcher = LogWatcher()
+    assert watcher.uses_inotify == (request.param == "inotify")
+    yield watcher
+    watcher.close()
+
+
+def append_later(path, delay, line="[FLog::Output] new line\n"):
+    """Appends line to path after delay on another thread.
+
+    Returns the thread and a list that gets the monotonic time just before the write.
+    """
+    written = []
+
+    def append():
+        time.sleep(delay)
+        with open(path, "a", encoding="utf-8") as f:
+            written.append(time.monotonic())
+            f.write(line)
+
+    thread = threading.Thread(target=append, daemon=True)
+    thread.start()
+    return thread, written
+
+
+def test_wakeup_latency_after_an_append(watcher, tmp_path):
+    """Benchmark: time from appending a line to the log until wait_for_change returns"""
+    log = tmp_path / "roblox.log"
+    log.write_text("first line\n", encoding="utf-8")
+    watcher.watch(str(log))
+    latencies = []
+    for i in range(TRIALS):
+        writer, written = append_later(log, 0.02 * i)  # Vary how long the watcher has been idle
+        assert watcher.wait_for_change(timeout=5)
+        latencies.append(time.monotonic() - written[0])
+        writer.join()
+        while watcher.wait_for_change(timeout=0.05):
+            pass  # Swallow the close-after-write event so it doesn't end the next round early
+
+    backend = "inotify" if watcher.uses_inotify else "polling"
+    print(f"\n{backend}: median wake-up {statistics.median(latencies) * 1000:.2f} ms, "
+          f"worst {max(latencies) * 1000:.2f} ms over {TRIALS} appends")
+    if watcher.uses_inotify:
+        assert statistics.median(latencies) < 0.02
+    else:
+        # Bounded by the longest polling interval
+        assert max(latencies) < 0.5 + 0.1
+
+
+def test_nothing_changes_so_the_wait_times_out(watcher, tmp_path):
+    log = tmp_path / "roblox.log"
+    log.write_text("first line\n", encoding="utf-8")
+    watcher.watch(str(log))
+    started = time.monotonic()
+    assert not watcher.wait_for_change(timeout=0.3)
+    assert time.monotonic() - started >= 0.25
+
+
+def test_new_log_in_a_watched_directory_wakes_the_waiter(watcher, tmp_path):
+    watcher.watch(str(tmp_path))
+    append_later(tmp_path / "newer.log", 0.05)
+    assert watcher.wait_for_change(timeout=5)
+
+
+def test_wake_releases_a_blocked_waiter(watcher, tmp_path):
+    watcher.watch(str(tmp_path))
+    threading.Timer(0.05, watcher.wake).start()
+    started = time.monotonic()
+    assert watcher.wait_for_change(timeout=5)
+    assert time.monotonic() - started < 1
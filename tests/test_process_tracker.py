@@ -0,0 +1,69 @@
+from utils import ROBLOX_PROCESS_NAME, RobloxProcessTracker
+
+
+class FakeProcessTable:
+    """A process table the tracker can scan, counting full scans"""
+
+    def __init__(self, processes=None):
+        self.processes = dict(processes or {})  # pid -> name
+        self.scans = 0
+
+    def __call__(self):
+        self.scans += 1
+        return iter(list(self.processes.items()))
+
+    def pid_exists(self, pid):
+        return pid in self.processes
+
+
+def make_tracker(processes):
+    table = FakeProcessTable(processes)
+    return table, RobloxProcessTracker(table, table.pid_exists)
+
+
+def background_processes(count=1000):
+    return {pid: f"svc{pid}.exe" for pid in range(10000, 10000 + count)}
+
+
+def test_running_roblox_is_found_once_then_only_checked():
+    table, tracker = make_tracker({**background_processes(), 4242: ROBLOX_PROCESS_NAME})
+    for _ in range(100):
+        assert tracker.is_running()
+    assert table.scans == 1
+    assert tracker.pids == {4242}
+
+
+def test_exit_is_noticed():
+    table, tracker = make_tracker({**background_processes(), 4242: ROBLOX_PROCESS_NAME})
+    assert tracker.is_running()
+    del table.processes[4242]
+    assert not tracker.is_running()
+
+
+def test_relaunch_is_noticed_without_invalidate():
+    # With a locked log file no new log is picked up, so nothing calls invalidate()
+    table, tracker = make_tracker({**background_processes(), 4242: ROBLOX_PROCESS_NAME})
+    assert tracker.is_running()
+    del table.processes[4242]
+    assert not tracker.is_running()
+    assert not tracker.is_running()
+    table.processes[5151] = ROBLOX_PROCESS_NAME
+    assert tracker.is_running()
+    assert tracker.pids == {5151}
+
+
+def test_invalidate_picks_up_a_second_instance():
+    table, tracker = make_tracker({4242: ROBLOX_PROCESS_NAME})
+    assert tracker.is_running()
+    table.processes[5151] = ROBLOX_PROCESS_NAME
+    tracker.invalidate()
+    assert tracker.is_running()
+    assert tracker.pids == {4242, 5151}
+
+
+def test_scan_errors_count_as_running():
+    def broken_table():
+        raise OSError("access denied")
+
+    tracker = RobloxProcessTracker(broken_table, lambda pid: False)
+    assert tracker.is_running()
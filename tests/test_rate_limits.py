@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+pytest.importorskip("requests")
+
+from helpers import wait_until  # noqa: E402
+from webhooks import PRIORITY_CRITICAL, RateLimitTracker, WebhookDispatcher, WebhookJob  # noqa: E402
+
+LIMIT = 5
+WINDOW = 2.0
+
+
+class WindowLimiter:
+    """Discord-style fixed window: LIMIT requests per WINDOW seconds, 429 with retry_after beyond that"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.window_start = None
+        self.used = 0
+        self.accepted = []  # monotonic times of accepted requests
+        self.rejected = 0
+
+    def __call__(self, request):
+        with self.lock:
+            now = time.monotonic()
+            if self.window_start is None or now - self.window_start >= WINDOW:
+                self.window_start, self.used = now, 0
+            reset_after = self.window_start + WINDOW - now
+            if self.used >= LIMIT:
+                self.rejected += 1
+                body = json.dumps({"retry_after": reset_after}).encode()
+                return 429, {"Content-Type": "application/json", "X-RateLimit-Remaining": "0",
+                             "X-RateLimit-Reset-After": f"{reset_after:.3f}"}, body
+            self.used += 1
+            self.accepted.append(now)
+            return 204, {"X-RateLimit-Limit": str(LIMIT), "X-RateLimit-Remaining": str(LIMIT - self.used),
+                         "X-RateLimit-Reset-After": f"{reset_after:.3f}"}, b""
+
+
+def test_dispatcher_paces_itself_to_the_rate_limit(stub_server):
+    limiter = WindowLimiter()
+    stub_server.respond = limiter
+    dispatcher = WebhookDispatcher(num_workers=4, coalesce_window=0)
+    count = 3 * LIMIT
+    for i in range(count):
+        # Critical jobs are sent one message each, never merged
+        dispatcher.submit(WebhookJob(stub_server.url + "/hook", {"embeds": [{"title": f"event {i}"}]},
+                                     priority=PRIORITY_CRITICAL))
+
+    assert wait_until(lambda: dispatcher.metrics.snapshot()["counters"]["delivered"] == count, timeout=15)
+    counters = dispatcher.metrics.snapshot()["counters"]
+    assert counters["failed"] == 0
+    # One request probes each new window, then the headers keep the rest under the limit
+    assert limiter.rejected == 0
+    assert counters["rate_limited"] == 0
+    # All three windows were needed, and none of them took more than LIMIT requests
+    assert limiter.accepted[-1] - limiter.accepted[0] >= 2 * WINDOW - 0.5
+
+
+def test_429_is_waited_out_and_retried(stub_server):
+    answers = iter([429])
+
+    def respond(request):
+        if next(answers, None) == 429:
+            return 429, {"Content-Type": "application/json"}, json.dumps({"retry_after": 0.3}).encode()
+        return 204, {}, b""
+
+    stub_server.respond = respond
+    dispatcher = WebhookDispatcher(num_workers=1, coalesce_window=0)
+    job = WebhookJob(stub_server.url + "/hook", {"embeds": [{"title": "event"}]}, priority=PRIORITY_CRITICAL)
+    started = time.monotonic()
+    dispatcher.deliver(job)
+    assert job.success
+    assert job.rate_limit_retries == 1
+    assert time.monotonic() - started >= 0.3
+    assert len(stub_server.requests) == 2
+
+
+def test_tracker_hands_out_the_remaining_slots_then_waits():
+    tracker = RateLimitTracker()
+    url = "https://discord.com/api/webhooks/1/a"
+    assert tracker.reserve(url) == 0  # Nothing known yet: this request probes the window
+    assert tracker.reserve(url) > 0  # The rest wait for its headers
+    tracker.update(url, {"X-RateLimit-Remaining": "2", "X-RateLimit-Reset-After": "1.5"})
+    assert tracker.reserve(url) == 0
+    assert tracker.reserve(url) == 0
+    assert 1.0 < tracker.reserve(url) <= 1.5
+    assert tracker.reserve("https://discord.com/api/webhooks/2/b") == 0  # Buckets are per webhook
+
+
+def test_tracker_keeps_the_lowest_count_within_a_window():
+    tracker = RateLimitTracker()
+    url = "https://discord.com/api/webhooks/1/a"
+    tracker.update(url, {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset-After": "1.0"})
+    # An older response (sent earlier in the same window) arrives late with a higher count
+    tracker.update(url, {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset-After": "1.0"})
+    assert tracker.reserve(url) == 0
+    assert tracker.reserve(url) > 0
+
+
+def test_tracker_probe_ends_with_any_response():
+    tracker = RateLimitTracker()
+    url = "https://example.com/hook"
+    assert tracker.reserve(url) == 0
+    tracker.update(url, {})  # No rate-limit headers at all
+    assert tracker.reserve(url) == 0
+
+
+def test_tracker_block_holds_every_request():
+    tracker = RateLimitTracker()
+    url = "https://discord.com/api/webhooks/1/a"
+    tracker.block(url, 0.5)
+    assert 0.4 < tracker.reserve(url) <= 0.5
+    tracker.update(url, {"X-RateLimit-Remaining": "5"})  # Incomplete headers are ignored
+    assert tracker.reserve(url) > 0
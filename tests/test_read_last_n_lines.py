@@ -0,0 +1,93 @@
+import os
+import random
+import timeit
+
+import pytest
+
+from utils import read_last_n_lines
+
+
+def chunked_read_last_n_lines(path, n=20):
+    """The reader read_last_n_lines replaced, kept as the benchmark baseline"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        buffer_size = 1024 * n
+        buffer = bytearray()
+
+        while f.tell() > 0 and len(buffer.splitlines()) <= n + 1:
+            seek_pos = max(0, f.tell() - buffer_size)
+            f.seek(seek_pos, os.SEEK_SET)
+            chunk = f.read(min(buffer_size, file_size - seek_pos))
+            buffer = chunk + buffer
+            f.seek(seek_pos, os.SEEK_SET)
+            if f.tell() == 0:
+                break
+
+        lines = buffer.decode('utf-8', errors='ignore').splitlines()
+
+    return lines[-n:] if len(lines) >= n else lines
+
+
+LINE_PIECES = ["[FLog::Output] ", "🔮 Royal Chest", "✨ aura", "", "x" * 3000, "\r", "Ünïcödé"]
+
+
+def random_log(rng, count):
+    lines = ["".join(rng.choice(LINE_PIECES) for _ in range(rng.randint(0, 4))) for _ in range(count)]
+    return "\n".join(lines) + rng.choice(["", "\n", "\r\n", "\n\n"])
+
+
+def test_matches_splitlines_on_random_logs(tmp_path):
+    rng = random.Random(5)
+    path = tmp_path / "roblox.log"
+    for _ in range(200):
+        text = random_log(rng, rng.randint(0, 60))
+        path.write_bytes(text.encode("utf-8"))
+        for n in (1, 2, 7, 50, 500):
+            assert read_last_n_lines(str(path), n) == text.splitlines()[-n:], (text, n)
+
+
+def test_multibyte_characters_are_never_split(tmp_path):
+    path = tmp_path / "roblox.log"
+    # Put a 4-byte emoji across every possible 1 KB boundary of the old chunked reader
+    for pad in range(4):
+        text = "a" * (1024 - pad) + "🔮 Royal Chest\nlast line\n"
+        path.write_bytes(text.encode("utf-8"))
+        assert read_last_n_lines(str(path), 1) == ["last line"]
+        assert read_last_n_lines(str(path), 2) == text.splitlines()
+
+
+@pytest.mark.parametrize("content, expected", [(b"", []), (b"\n", [""]), (b"only line", ["only line"])])
+def test_edge_cases(tmp_path, content, expected):
+    path = tmp_path / "roblox.log"
+    path.write_bytes(content)
+    assert read_last_n_lines(str(path), 5) == expected
+    assert read_last_n_lines(str(path), 0) == []
+
+
+def test_missing_file_gives_no_lines(tmp_path):
+    assert read_last_n_lines(str(tmp_path / "missing.log"), 5) == []
+
+
+@pytest.mark.parametrize("size_mb", [1, 64])
+@pytest.mark.parametrize("line_length", [120, 4000])
+def test_benchmark_against_the_chunked_reader(tmp_path, size_mb, line_length):
+    """Benchmark: the deep-scan (n=500) and test-scan (n=50) reads on a large log"""
+    path = tmp_path / "roblox.log"
+    line = ("2025-05-09T12:34:56.789Z,0.1,abc,6 [FLog::Output] " + "🔮" * (line_length // 8)).encode("utf-8")
+    line = line[:line_length].decode("utf-8", errors="ignore").encode("utf-8") + b"\n"
+    with open(path, "wb") as f:
+        block = line * max(1, (1 << 20) // len(line))
+        for _ in range(size_mb):
+            f.write(block)
+
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - (4 << 20)))
+        expected = f.read().decode("utf-8", errors="ignore").splitlines()
+    for n in (50, 500):
+        assert read_last_n_lines(str(path), n) == expected[-n:]
+        new = min(timeit.repeat(lambda: read_last_n_lines(str(path), n), number=5, repeat=3)) / 5
+        old = min(timeit.repeat(lambda: chunked_read_last_n_lines(str(path), n), number=5, repeat=3)) / 5
+        print(f"\n{size_mb} MB, {line_length}-byte lines, n={n}: "
+              f"chunked {old * 1000:.2f} ms, mmap {new * 1000:.2f} ms ({old / new:.1f}x)")
+        assert new < old
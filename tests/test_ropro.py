@@ -0,0 +1,125 @@
+import collections
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import requests  # noqa: E402
+from ropro import RoProLinkResolver, invite_api_url  # noqa: E402
+
+JOB = "3f2a9c1e-5b7d-4e21-9a0c-7d1e2b3c4d5e"
+OTHER_JOB = "0b1c2d3e-4f50-4617-8293-a4b5c6d7e8f9"
+
+
+class StubResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+class StubRoProSession:
+    """Stands in for requests.Session: answers RoPro invite requests after a delay, counting them per job id"""
+
+    def __init__(self, delay=0.2, status_code=200):
+        self.delay = delay
+        self.status_code = status_code
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        job_id = url.rsplit("serverid=", 1)[1]
+        with self._lock:
+            self.calls[job_id] += 1
+        time.sleep(self.delay)
+        if self.status_code is None:
+            raise requests.exceptions.ConnectionError("RoPro is down")
+        return StubResponse(self.status_code, f"https://ro.pro/{job_id[:8]}\n")
+
+
+def resolve_concurrently(resolver, job_ids, callers=20):
+    results = []
+    lock = threading.Lock()
+
+    def worker(job_id):
+        result = resolver.resolve(job_id, timeout=5)
+        with lock:
+            results.append((job_id, result))
+
+    threads = [threading.Thread(target=worker, args=(job_ids[i % len(job_ids)],)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_callers_share_one_upstream_call_per_job_id():
+    session = StubRoProSession()
+    resolver = RoProLinkResolver(session=session)
+    results = resolve_concurrently(resolver, [JOB, OTHER_JOB], callers=40)
+
+    assert session.calls == {JOB: 1, OTHER_JOB: 1}
+    assert resolver.upstream_calls == 2
+    for job_id, (link, resolved) in results:
+        assert resolved
+        assert link == f"https://ro.pro/{job_id[:8]}"
+
+
+def test_cached_links_are_returned_without_calling_upstream():
+    session = StubRoProSession(delay=0)
+    resolver = RoProLinkResolver(session=session)
+    assert resolver.cached(JOB) is None
+    assert resolver.resolve(JOB, timeout=5) == (f"https://ro.pro/{JOB[:8]}", True)
+    for _ in range(10):
+        assert resolver.resolve(JOB, timeout=0) == (f"https://ro.pro/{JOB[:8]}", True)
+    assert resolver.cached(JOB) == f"https://ro.pro/{JOB[:8]}"
+    assert session.calls[JOB] == 1
+
+
+def test_expired_links_are_looked_up_again():
+    session = StubRoProSession(delay=0)
+    resolver = RoProLinkResolver(ttl=0.05, session=session)
+    resolver.resolve(JOB, timeout=5)
+    time.sleep(0.1)
+    assert resolver.cached(JOB) is None
+    resolver.resolve(JOB, timeout=5)
+    assert session.calls[JOB] == 2
+
+
+@pytest.mark.parametrize("status_code", [500, None])
+def test_failures_back_off_instead_of_calling_upstream_every_time(status_code):
+    session = StubRoProSession(delay=0, status_code=status_code)
+    resolver = RoProLinkResolver(failure_backoff=(0.2, 1.0), session=session)
+    assert resolver.resolve(JOB, timeout=5) == (invite_api_url(JOB), False)
+    for _ in range(10):
+        assert resolver.resolve(JOB, timeout=5) == (invite_api_url(JOB), False)
+    assert session.calls[JOB] == 1
+
+    time.sleep(0.25)
+    resolver.resolve(JOB, timeout=5)
+    assert session.calls[JOB] == 2
+
+
+def test_resolve_with_zero_timeout_never_waits():
+    session = StubRoProSession(delay=0.5)
+    resolver = RoProLinkResolver(session=session)
+    started = time.monotonic()
+    assert resolver.resolve(JOB, timeout=0) == (invite_api_url(JOB), False)
+    assert time.monotonic() - started < 0.1
+
+
+def test_prefetch_callback_gets_the_link():
+    session = StubRoProSession(delay=0.05)
+    resolver = RoProLinkResolver(session=session)
+    received = []
+    done = threading.Event()
+    resolver.prefetch(JOB, callback=lambda job_id, link: (received.append((job_id, link)), done.set()))
+    assert done.wait(5)
+    assert received == [(JOB, f"https://ro.pro/{JOB[:8]}")]
+
+    # Already cached: the callback runs straight away
+    resolver.prefetch(JOB, callback=lambda job_id, link: received.append((job_id, link)))
+    assert len(received) == 2
+    assert session.calls[JOB] == 1
@@ -0,0 +1,157 @@
+import io
+import os
+import threading
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from screenshots import SCREENSHOT_FORMATS, ScreenshotEncoder, encode_image, screenshot_settings  # noqa: E402
+
+
+def synthetic_capture(width=640, height=360):
+    """A gradient with some flat panels, roughly like a game screenshot"""
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    image.paste((40, 160, 220), (20, 20, width // 3, height // 4))
+    image.paste((250, 250, 250), (width // 2, height // 2, width - 20, height - 20))
+    return image
+
+
+@pytest.mark.parametrize("fmt", sorted(SCREENSHOT_FORMATS))
+def test_encodes_in_memory_to_the_chosen_format(fmt, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    encoded = encode_image(synthetic_capture(), "capture", fmt, quality=70)
+    extension, content_type = SCREENSHOT_FORMATS[fmt]
+    assert encoded.filename == f"capture.{extension}"
+    assert encoded.content_type == content_type
+    assert encoded.size == len(encoded.data) > 0
+    decoded = Image.open(io.BytesIO(encoded.data))
+    assert decoded.format == fmt
+    assert decoded.size == (640, 360)
+    assert os.listdir(tmp_path) == []  # Nothing written to disk
+
+
+def test_max_dimension_scales_down_keeping_the_aspect_ratio():
+    image = synthetic_capture(1920, 1080)
+    encoded = encode_image(image, "capture", "WEBP", max_dimension=960)
+    assert Image.open(io.BytesIO(encoded.data)).size == (960, 540)
+    assert image.size == (1920, 1080)  # The caller's image is left alone
+
+    small = encode_image(synthetic_capture(320, 180), "capture", "PNG", max_dimension=960)
+    assert Image.open(io.BytesIO(small.data)).size == (320, 180)
+
+
+def test_jpeg_accepts_captures_with_alpha():
+    image = synthetic_capture().convert("RGBA")
+    encoded = encode_image(image, "capture", "JPEG")
+    assert Image.open(io.BytesIO(encoded.data)).mode == "RGB"
+
+
+def test_png_baseline_is_only_measured_when_asked_for():
+    image = synthetic_capture()
+    encoded = encode_image(image, "capture", "WEBP")
+    assert encoded.baseline_size is None
+    assert encoded.savings_message() == f"capture.webp: {encoded.size / 1024:.1f} KB"
+
+    measured = encode_image(image, "capture", "WEBP", measure_baseline=True)
+    assert measured.baseline_size > measured.size
+    assert "saved" in measured.savings_message()
+
+
+class Config:
+    def __init__(self, **settings):
+        self.__dict__.update(settings)
+
+
+@pytest.mark.parametrize("config, expected", [
+    (Config(), ("PNG", 80, 0)),
+    (Config(screenshot_format="webp", screenshot_quality=65, screenshot_max_dimension=1280), ("WEBP", 65, 1280)),
+    (Config(screenshot_format="BMP", screenshot_quality="high", screenshot_max_dimension=-5), ("PNG", 80, 0)),
+    (Config(screenshot_format=None, screenshot_quality=500, screenshot_max_dimension=None), ("PNG", 100, 0)),
+])
+def test_settings_fall_back_to_safe_values(config, expected):
+    assert screenshot_settings(config) == expected
+
+
+def test_encoder_calls_back_from_its_own_thread():
+    encoder = ScreenshotEncoder()
+    results = []
+    done = threading.Event()
+
+    def callback(encoded, error):
+        results.append((encoded, error, threading.current_thread().name))
+        done.set()
+
+    try:
+        encoder.submit(synthetic_capture(), "capture", ("WEBP", 80, 0), callback)
+        assert done.wait(10)
+        encoded, error, thread_name = results[0]
+        assert error is None
+        assert encoded.filename == "capture.webp"
+        assert thread_name.startswith("RiftScopeEncoder")
+
+        done.clear()
+        encoder.submit(synthetic_capture(), "capture", ("GIF", 80, 0), callback)
+        assert done.wait(10)
+        assert results[1][0] is None
+        assert isinstance(results[1][1], KeyError)
+    finally:
+        encoder.shutdown()
+
+
+# Segments lit for each digit of a seven-segment display: top, top-left, top-right, middle,
+# bottom-left, bottom-right, bottom
+SEGMENTS = {
+    "0": "abcefg", "1": "cf", "2": "acdeg", "3": "acdfg", "4": "bcdf",
+    "5": "abdfg", "6": "abdefg", "7": "acf", "8": "abcdefg", "9": "abcdfg",
+}
+
+
+def currency_display(text, noise=0, seed=0):
+    """A dark counter showing text in light seven-segment digits, with optional pixel noise"""
+    image = Image.new("L", (40 + 36 * len(text), 80), 20)
+    for i, digit in enumerate(text):
+        x, y = 20 + 36 * i, 10
+        boxes = {
+            "a": (x, y, x + 24, y + 5), "b": (x, y, x + 5, y + 30), "c": (x + 19, y, x + 24, y + 30),
+            "d": (x, y + 28, x + 24, y + 33), "e": (x, y + 30, x + 5, y + 60), "f": (x + 19, y + 30, x + 24, y + 60),
+            "g": (x, y + 55, x + 24, y + 60),
+        }
+        for segment in SEGMENTS[digit]:
+            image.paste(230, boxes[segment])
+    if noise:
+        np = pytest.importorskip("numpy")
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return image.convert("RGB")
+
+
+THRESHOLD = 12  # The default currency_change_threshold
+
+
+def test_pixel_noise_stays_under_the_change_threshold():
+    pytest.importorskip("numpy")
+    from screenshots import frame_difference, frame_signature
+    previous = frame_signature(currency_display("1234567", noise=6, seed=1))
+    current = frame_signature(currency_display("1234567", noise=6, seed=2))
+    assert frame_difference(previous, current) < THRESHOLD
+
+
+@pytest.mark.parametrize("before, after", [("1234567", "1234568"), ("1234567", "1234561"), ("1000000", "1000001")])
+def test_a_changed_digit_goes_over_the_change_threshold(before, after):
+    pytest.importorskip("numpy")
+    from screenshots import frame_difference, frame_signature
+    previous = frame_signature(currency_display(before, noise=6, seed=1))
+    current = frame_signature(currency_display(after, noise=6, seed=2))
+    assert frame_difference(previous, current) > THRESHOLD
+
+
+def test_missing_or_resized_signatures_always_count_as_changed():
+    pytest.importorskip("numpy")
+    from screenshots import frame_difference, frame_signature
+    signature = frame_signature(currency_display("1234"))
+    assert frame_difference(None, signature) == float("inf")
+    assert frame_difference(signature, None) == float("inf")
+    assert frame_difference(signature, frame_signature(currency_display("12345"))) == float("inf")
+    assert frame_difference(signature, frame_signature(currency_display("1234"))) == 0
@@ -0,0 +1,95 @@
+import pytest
+
+from server_parser import SERVER_LINE_KEYWORDS, SERVER_LINE_PATTERNS, ServerLineParser
+from server_session import LINE_CONNECT, LINE_DISCONNECT, LINE_JOIN, LINE_TELEPORT
+
+JOB = "3f2a9c1e-5b7d-4e21-9a0c-7d1e2b3c4d5e"
+PLACE = "85896571713843"
+
+# (pattern name, kind, line) as written by the Roblox client and the Bloxstrap/Fishstrap launchers
+CORPUS = [
+    ("joining_game", LINE_JOIN,
+     f"2026-10-17T10:00:00.123Z,12.345678,1a2c,6 [FLog::Output] ! Joining game '{JOB}' place {PLACE} at 128.116.1.2"),
+    ("join_game_job_first", LINE_JOIN,
+     f"2026-10-17T10:00:00.123Z,12.345678,1a2c,6 [FLog::GameJoinUtil] GameJoinUtil::JoinGame: "
+     f"jobId={JOB}&placeId={PLACE}&isTeleport=false"),
+    ("join_game_place_first", LINE_JOIN,
+     f"2026-10-17T10:00:00.123Z,12.345678,1a2c,6 [FLog::GameJoinUtil] GameJoinUtil::JoinGame: "
+     f"placeId={PLACE}&jobId={JOB}"),
+    ("server_instance", LINE_CONNECT,
+     f"2026-10-17T10:00:01.000Z,13.000000,1a2c,6 [FLog::Network] ServerInstance: {JOB} PlaceId: {PLACE}"),
+    ("connected_to_game", LINE_CONNECT,
+     f"2026-10-17T10:00:01.000Z,13.000000,1a2c,6 [FLog::Network] Connected to Game ({PLACE}/{JOB})"),
+    ("disconnected_from_game", LINE_DISCONNECT,
+     f"2026-10-17T10:30:00.000Z,1800.000000,1a2c,6 [FLog::Network] Disconnected from Game ({PLACE}/{JOB})"),
+    ("teleporting_to", LINE_TELEPORT,
+     f"2026-10-17T10:30:00.000Z,1800.000000,1a2c,6 [FLog::SingleSurfaceApp] Teleporting to ({PLACE}/{JOB})"),
+    ("game", LINE_CONNECT,
+     f"2026-10-17T10:00:01.000Z,13.000000,1a2c,6 [FLog::Network] Replicator created: Game ({PLACE}/{JOB})"),
+]
+
+
+@pytest.mark.parametrize("name, kind, line", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_corpus_line_parses_named_groups(name, kind, line):
+    parsed = ServerLineParser().parse(line)
+    assert parsed is not None
+    assert parsed.pattern == name
+    assert parsed.kind == kind
+    assert parsed.job_id == JOB
+    assert parsed.place_id == PLACE
+
+
+def test_corpus_covers_every_pattern():
+    covered = {name for name, _, _ in CORPUS} | {"teleport_service"}
+    assert covered == {name for name, _, _, _ in SERVER_LINE_PATTERNS}
+
+
+def test_teleport_service_line_has_no_ids():
+    parsed = ServerLineParser().parse("[FLog::TeleportService] TeleportService:Teleport called")
+    assert parsed.kind == LINE_TELEPORT
+    assert parsed.pattern == "teleport_service"
+    assert parsed.job_id is None and parsed.place_id is None
+
+
+def test_teleport_service_error_text_is_not_read_as_ids():
+    # The old loose pattern read job id "fa" and place id "773" out of this line
+    parsed = ServerLineParser().parse("[FLog::TeleportService] TeleportService:Teleport failed code 773")
+    assert parsed.kind == LINE_TELEPORT
+    assert parsed.job_id is None and parsed.place_id is None
+
+
+@pytest.mark.parametrize("line", [
+    # A UUID followed by 8+ digits, which the removed generic pattern took for a server
+    f"[FLog::HttpAudit] GET https://assetdelivery.roblox.com/v1/assets/{JOB}?version=12345678",
+    f"[FLog::Output] Loaded package {JOB} in 123456789 us",
+    # Keyword present but no ids
+    "[FLog::Output] Game (loading)",
+    f"[FLog::Output] Connected to Game ({PLACE}/not-a-job-id)",
+])
+def test_false_positives_are_rejected(line):
+    assert ServerLineParser().parse(line) is None
+
+
+def test_lines_without_keywords_are_rejected():
+    parser = ServerLineParser()
+    assert parser.parse("[FLog::Graphics] Frame 12 took 16 ms") is None
+    assert parser.stats() == {"hits": {}, "misses": 0}
+
+
+def test_hit_counters():
+    parser = ServerLineParser()
+    for _, _, line in CORPUS:
+        parser.parse(line)
+    parser.parse(CORPUS[0][2])
+    parser.parse("[FLog::Output] Game (loading)")
+
+    stats = parser.stats()
+    assert stats["hits"]["joining_game"] == 2
+    assert next(iter(stats["hits"])) == "joining_game"  # Most used first
+    assert all(stats["hits"][name] == 1 for name, _, _ in CORPUS[1:])
+    assert stats["misses"] == 1
+
+
+def test_keywords_are_the_pattern_literals():
+    assert set(SERVER_LINE_KEYWORDS) == {literal for _, _, literal, _ in SERVER_LINE_PATTERNS}
+    assert len(SERVER_LINE_KEYWORDS) == len(set(SERVER_LINE_KEYWORDS))
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+pytest.importorskip("requests")
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer  # noqa: E402
+from webhooks import PRIORITY_CRITICAL, WebhookDispatcher, WebhookJob  # noqa: E402
+
+LATENCY = 2.0
+TICK_MS = 10
+
+
+def test_event_loop_keeps_ticking_while_discord_is_slow(stub_server):
+    """Benchmark: every request takes LATENCY seconds, yet the Qt event loop is never held up"""
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841
+    stub_server.respond = lambda request: (time.sleep(LATENCY), (204, {}, b""))[1]
+    dispatcher = WebhookDispatcher(num_workers=4, coalesce_window=0)
+    finished = []
+    loop = QEventLoop()
+    count = 4
+
+    def on_finished(job):
+        finished.append(job)
+        if len(finished) == count:
+            loop.quit()
+
+    # Emitted on the worker threads, delivered here by the event loop like in the app
+    dispatcher.finished_signal.connect(on_finished)
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.monotonic()))
+    timer.start(TICK_MS)
+
+    started = time.monotonic()
+    for i in range(count):
+        # One webhook each, so none of them wait for another's rate-limit headers
+        assert dispatcher.submit(WebhookJob(f"{stub_server.url}/hook/{i}", {"embeds": [{"title": f"event {i}"}]},
+                                            priority=PRIORITY_CRITICAL))
+    submit_time = time.monotonic() - started
+    QTimer.singleShot(int(LATENCY * 4 * 1000), loop.quit)  # Give up eventually
+    loop.exec()
+    elapsed = time.monotonic() - started
+    timer.stop()
+    dispatcher.stop()
+
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    print(f"\nsubmit {count} jobs: {submit_time * 1000:.2f} ms, all delivered after {elapsed:.2f} s, "
+          f"{len(ticks)} ticks, longest gap between ticks {max(gaps) * 1000:.1f} ms")
+    assert len(finished) == count and all(job.success for job in finished)
+    assert submit_time < 0.1
+    assert elapsed >= LATENCY
+    assert max(gaps) < 0.25
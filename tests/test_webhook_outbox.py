@@ -0,0 +1,108 @@
+import collections
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+pytest.importorskip("requests")
+
+from PyQt6.QtCore import Qt  # noqa: E402
+from helpers import wait_until  # noqa: E402
+from webhooks import WebhookDispatcher, WebhookJob, WebhookOutbox  # noqa: E402
+
+BURST = 60
+ACCEPTED_BEFORE_CRASH = 20
+
+# Submits a burst through a dispatcher with an outbox, then waits to be killed
+CHILD = textwrap.dedent("""
+    import sys, time
+    from webhooks import WebhookDispatcher, WebhookJob, WebhookOutbox
+    url, outbox_path, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    dispatcher = WebhookDispatcher(coalesce_window=0.05, outbox=WebhookOutbox(outbox_path))
+    for i in range(count):
+        dispatcher.submit(WebhookJob(url, {"embeds": [{"title": f"event {i}"}]}))
+    time.sleep(0.5)  # Let the group commit reach the disk
+    print("submitted", flush=True)
+    time.sleep(60)
+""")
+
+
+def test_kill_during_burst_then_every_event_is_delivered_once_after_restart(stub_server, tmp_path):
+    outbox_path = str(tmp_path / "outbox.db")
+    accepted = collections.Counter()
+    lock = threading.Lock()
+    stalled = threading.Event()  # Set once the server stops answering, until the restart
+    restarted = threading.Event()
+    requests_after_restart = [0]
+
+    def respond(request):
+        if restarted.is_set():
+            with lock:
+                requests_after_restart[0] += 1
+                if requests_after_restart[0] % 5 == 0:
+                    return 503, {}, b""  # Some failures on the way back too
+                accepted.update(request.titles())
+            return 204, {}, b""
+        with lock:
+            if sum(accepted.values()) < ACCEPTED_BEFORE_CRASH:
+                accepted.update(request.titles())
+                return 204, {}, b""
+        # Hold everything else open so the process dies with these requests unanswered
+        stalled.set()
+        restarted.wait(30)
+        return 503, {}, b""
+
+    stub_server.respond = respond
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    child = subprocess.Popen([sys.executable, "-c", CHILD, stub_server.url + "/hook", outbox_path, str(BURST)],
+                             stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        # Skip any import-time warnings
+        assert any(line.strip() == "submitted" for line in iter(child.stdout.readline, ""))
+        assert stalled.wait(10)
+        wait_until(lambda: False, timeout=0.3)  # Let the acks of the accepted requests land
+    finally:
+        child.kill()
+        child.wait()
+    delivered_before_crash = sum(accepted.values())
+    assert 0 < delivered_before_crash < BURST
+
+    restarted.set()
+    outbox = WebhookOutbox(outbox_path)
+    dispatcher = WebhookDispatcher(coalesce_window=0.05, outbox=outbox)
+    dispatcher.RETRY_BASE_DELAY = 0.05
+    assert dispatcher.recover() == BURST - delivered_before_crash
+    assert wait_until(lambda: sum(accepted.values()) >= BURST, timeout=20)
+    assert wait_until(lambda: not outbox.pending())
+
+    assert set(accepted) == {f"event {i}" for i in range(BURST)}
+    assert set(accepted.values()) == {1}  # Exactly once: nothing lost, nothing sent twice
+
+
+class FailingOutbox(WebhookOutbox):
+    """An outbox whose writes always fail (e.g. a locked database)"""
+
+    def add_many(self, jobs):
+        return False
+
+
+def test_drop_after_failed_outbox_write_is_counted_and_logged(stub_server, tmp_path):
+    release = threading.Event()
+    stub_server.respond = lambda request: (release.wait(10), (204, {}, b""))[1]
+    dispatcher = WebhookDispatcher(num_workers=1, max_queue_size=1, coalesce_window=0,
+                                   outbox=FailingOutbox(str(tmp_path / "outbox.db")))
+    messages = []
+    # Direct, since the test has no Qt event loop to deliver queued signals
+    dispatcher.status_signal.connect(messages.append, Qt.ConnectionType.DirectConnection)
+    try:
+        for i in range(4):
+            assert dispatcher.submit(WebhookJob(stub_server.url + "/hook", {"embeds": [{"title": f"event {i}"}]}))
+            wait_until(lambda: dispatcher._persist_queue.empty())
+        assert wait_until(lambda: dispatcher.metrics.snapshot()["counters"]["dropped"] == 2)
+        assert sum("dropped notification" in message for message in messages) == 2
+    finally:
+        release.set()
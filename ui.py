@@ -1,10 +1,9 @@
 import os
 import time
-import json
 import threading
-import requests
 import sys
 import re
+import copy
 from datetime import datetime
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QLabel, QLineEdit, QPushButton, 
@@ -24,7 +23,11 @@ except ImportError:
 from models import Worker, CalibrationOverlay, AreaCalibrationOverlay, CurrencyScreenshotWorker, PIL_AVAILABLE
 from config import Config
 from utils import is_roblox_running, apply_roblox_fastflags, read_last_n_lines
-from detection import RiftDetector
+from detection import RiftDetector, DetectorSettings
+from webhooks import (EVENT_CURRENCY, EVENT_MERCHANT, EVENT_STATUS, PRIORITY_BULK, WebhookDispatcher, WebhookJob, WebhookOutbox,
+                      WebhookRouter)
+from ropro import RoProLinkResolver, invite_api_url
+from screenshots import ScreenshotEncoder
 from collection import CollectionManager
 from updater import UpdateManager
 
@@ -81,6 +84,13 @@ class RiftScopeApp(QMainWindow):
     update_prompt_signal = pyqtSignal(str, str)
     start_hotkey_signal = pyqtSignal()
     stop_hotkey_signal = pyqtSignal()
+    server_link_resolved_signal = pyqtSignal(str, str)  # job id, ro.pro invite link
+    server_changed_signal = pyqtSignal(str, str, str)  # job id, place id, server link
+    launcher_status_signal = pyqtSignal(str)
+    merchant_webhook_signal = pyqtSignal(str, str, int, object)  # title, description, color, EncodedImage or None
+
+    # Server changes arriving within this many ms of each other are shown as one update
+    SERVER_UPDATE_COALESCE_MS = 100
 
     def __init__(self):
         super().__init__()
@@ -164,6 +174,17 @@ class RiftScopeApp(QMainWindow):
             print(f"Loaded merchant_shop_area_coords from config: {self.merchant_shop_area_coords}") # New
         
         # Initialize managers
+        self.link_resolver = RoProLinkResolver()
+        self.screenshot_encoder = ScreenshotEncoder()
+        self.webhook_router = WebhookRouter(self.config.webhook_routes)
+        for error in self.webhook_router.errors:
+            print(error)
+        # Enough workers that a fan-out to every routed webhook goes out in parallel
+        self.webhook_dispatcher = WebhookDispatcher(num_workers=min(max(4, self.webhook_router.webhook_count() + 1), 12),
+                                                    coalesce_window=max(self.config.webhook_coalesce_ms, 0) / 1000.0,
+                                                    outbox=WebhookOutbox(), link_resolver=self.link_resolver)
+        self.webhook_dispatcher.finished_signal.connect(self.on_webhook_finished)
+        self.webhook_dispatcher.status_signal.connect(self.update_status)
         self.detector = RiftDetector(self)
         self.collection_manager = CollectionManager(self)
         self.update_manager = UpdateManager(self, self.APP_VERSION, self.REPO_URL)
@@ -173,9 +194,17 @@ class RiftScopeApp(QMainWindow):
         
         # Apply Roblox configuration
         apply_roblox_fastflags(self.update_status)
+
+        # Resend notifications that were still undelivered when the app last closed
+        recovered = self.webhook_dispatcher.recover()
+        if recovered:
+            self.update_status(f"Resending {recovered} undelivered webhook notification(s) from the outbox")
         
         # Apply loaded config to UI
         self.config.apply_to_ui()
+
+        # Keep the detector's settings snapshot in step with the widgets
+        self._connect_detector_settings()
         
         # Update calibration button text and path selector
         self.collection_manager.update_all_calibration_buttons_text()
@@ -189,6 +218,10 @@ class RiftScopeApp(QMainWindow):
         # Connect hotkey signals
         self.start_hotkey_signal.connect(self.start_macro)
         self.stop_hotkey_signal.connect(self.stop_macro)
+        self.server_link_resolved_signal.connect(self.on_server_link_resolved)
+        self.server_changed_signal.connect(self.on_server_changed)
+        self.launcher_status_signal.connect(self.launcher_status.setText)
+        self.merchant_webhook_signal.connect(self.send_merchant_webhook)
 
         # Start hotkey listener thread
         if PYNPUT_AVAILABLE:
@@ -199,6 +232,29 @@ class RiftScopeApp(QMainWindow):
         self.update_checker_worker = Worker(self.update_manager.check_for_updates)
         self.update_checker_worker.start()
         
+    def _connect_detector_settings(self):
+        """Rebuild the detector's settings snapshot whenever one of the settings it uses changes"""
+        self._ping_settings = DetectorSettings.ping_settings(self)
+        line_edits = [self.pslink_entry, self.hatch_username_entry, self.hatch_userid_entry]
+        combos = [self.launcher_combo, self.server_mode_combo]
+        for setting in self._ping_settings:
+            line_edits.append(getattr(self, f"{setting}_ping_entry"))
+            ping_type_combo = getattr(self, f"{setting}_ping_type_combo", None)
+            if ping_type_combo is not None:
+                combos.append(ping_type_combo)
+        for line_edit in line_edits:
+            line_edit.textChanged.connect(self.update_detector_settings)
+        for combo in combos:
+            combo.currentTextChanged.connect(self.update_detector_settings)
+        for checkbox in (self.hatch_detection_enabled_checkbox, self.hatch_secret_ping_checkbox):
+            checkbox.toggled.connect(self.update_detector_settings)
+        self.update_detector_settings()
+
+    def update_detector_settings(self, *_):
+        """Hand the detector a fresh read-only copy of the settings (GUI thread only)"""
+        if hasattr(self, 'detector'):
+            self.detector.settings = DetectorSettings.from_app(self, getattr(self, '_ping_settings', None))
+
     def build_ui(self):
         """Construct the main application UI"""
         central_widget = QWidget()
@@ -857,6 +913,46 @@ class RiftScopeApp(QMainWindow):
         if log_font.family() == "Consolas": 
              self.log_console.setFont(log_font)
         logs_layout.addWidget(self.log_console)
+
+        # Webhook delivery stats, refreshed while the tab is open
+        stats_header_layout = QHBoxLayout()
+        stats_title_label = QLabel("Webhook Stats")
+        stats_title_font = QFont("Segoe UI", 10)
+        stats_title_font.setBold(True)
+        stats_title_label.setFont(stats_title_font)
+        stats_header_layout.addWidget(stats_title_label)
+        stats_header_layout.addStretch()
+        self.export_stats_button = QPushButton("Export JSON")
+        self.export_stats_button.clicked.connect(self.export_webhook_stats)
+        stats_header_layout.addWidget(self.export_stats_button)
+        logs_layout.addLayout(stats_header_layout)
+
+        self.stats_label = QLabel()
+        self.stats_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        if log_font.family() == "Consolas":
+            self.stats_label.setFont(log_font)
+        logs_layout.addWidget(self.stats_label)
+
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_webhook_stats)
+        self.stats_timer.start(2000)
+        self.refresh_webhook_stats()
+
+    def refresh_webhook_stats(self):
+        """Update the stats section of the Logs tab (skipped while another tab is showing)"""
+        if not hasattr(self, 'webhook_dispatcher') or not hasattr(self, 'stats_label'):
+            return
+        if self.tab_widget.currentWidget() is not self.logs_tab and self.stats_label.text():
+            return
+        self.stats_label.setText(self.webhook_dispatcher.metrics.summary())
+
+    def export_webhook_stats(self):
+        """Dump the webhook delivery stats to a JSON file in the app data folder"""
+        try:
+            path = self.webhook_dispatcher.metrics.dump()
+            self.update_status(f"Webhook stats written to {path}")
+        except OSError as e:
+            self.update_status(f"Error writing webhook stats: {e}")
         
     def _build_credits_tab(self):
         """Build the Credits tab UI"""
@@ -961,6 +1057,7 @@ class RiftScopeApp(QMainWindow):
             0xfaa61a  
         )
 
+        self.update_detector_settings()
         self.detector.test_worker = Worker(self.detector.run_test_scan)
         self.test_worker = self.detector.test_worker
         self.test_worker.update_status_signal.connect(self.update_status)
@@ -972,16 +1069,42 @@ class RiftScopeApp(QMainWindow):
         self.test_button.setEnabled(True)
         self.test_running = False
         
-    def send_webhook(self, title, description, image_url=None, color=0x7289DA, ping_content=None, file_path=None, worker_instance=None):
-        """Send a notification to the Discord webhook"""
-        webhook_url = self.webhook_entry.text().strip()
-        if not webhook_url:
+    def send_worker_webhook(self, title, description, image_url, color, ping_content, priority, event, tags, detected_at):
+        """Slot for Worker.webhook_signal, which carries the notification priority, routing event and detection time"""
+        self.send_webhook(title, description, image_url, color, ping_content, priority=priority, event=event, tags=tags,
+                          detected_at=detected_at)
+
+    def send_screenshot_webhook(self, title, description, color, attachment):
+        """Slot for CurrencyScreenshotWorker.send_webhook_signal; attachment is None for an "unchanged" heartbeat"""
+        queued = self.send_webhook(title, description, color=color, attachment=attachment, priority=PRIORITY_BULK,
+                                   event=EVENT_CURRENCY)
+        if attachment is not None and not queued and self.currency_worker:
+            # The screenshot never went out, so later identical frames must not be reported as unchanged
+            self.currency_worker.forget_last_sent()
+
+    def send_merchant_webhook(self, title, description, color, attachment):
+        """Slot for merchant_webhook_signal, which the merchant run and the screenshot encoder emit off the GUI thread"""
+        self.send_webhook(title, description, color=color, attachment=attachment, event=EVENT_MERCHANT)
+
+    def send_webhook(self, title, description, image_url=None, color=0x7289DA, ping_content=None, attachment=None,
+                     worker_instance=None, priority=None, event=EVENT_STATUS, tags=(), detected_at=None):
+        """Queue a notification for the Discord webhook; delivery happens in the background.
+
+        attachment is an in-memory screenshots.EncodedImage to upload with the message.
+        priority is one of the webhooks.PRIORITY_* lanes; by default screenshots are
+        bulk and everything else is normal. event and tags pick the destinations from
+        the webhook_routes config; the message is queued once per destination.
+        detected_at is the epoch time of the log line that triggered it, for the delivery stats.
+        Returns False if the notification was not queued for every destination.
+        """
+        webhook_urls = self.webhook_router.destinations(event, tags, self.webhook_entry.text().strip())
+        if not webhook_urls:
             status_message = "Webhook URL is missing, cannot send notification."
             if worker_instance and hasattr(worker_instance, 'update_status_signal'):
                 worker_instance.update_status_signal.emit(status_message)
             else:
                 self.update_status(status_message)
-            return
+            return False
 
         unix_timestamp = int(time.time())
         discord_timestamp = f"<t:{unix_timestamp}:F>"
@@ -1003,35 +1126,26 @@ class RiftScopeApp(QMainWindow):
             "inline": False
         })
 
-        if image_url and not file_path: # Only use image_url in embed if not sending a file
+        if image_url and not attachment: # Only use image_url in embed if not sending a file
             embed["thumbnail"] = {"url": image_url}
 
+        server_type = "Server Link"
+        if hasattr(self, 'server_mode_combo'):
+            server_type = f"{self.server_mode_combo.currentText()} Link"
+
         server_link = ""
+        ropro_job_id = None
         if hasattr(self, 'server_mode_combo'):
             server_mode = self.server_mode_combo.currentText()
             if server_mode == "Private Server":
                 server_link = self.pslink_entry.text().strip()
             elif server_mode == "Public Server" and hasattr(self, 'detector') and self.detector.current_job_id:
-                job_id = self.detector.current_job_id
-                current_link = self.pslink_entry.text().strip()
-                if current_link and current_link.startswith("http") and "ro.pro" in current_link:
-                    server_link = current_link
-                else:
-                    try:
-                        api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-                        response_link = requests.get(api_url, timeout=5)
-                        if response_link.status_code == 200 and response_link.text.strip().startswith("http"):
-                            server_link = response_link.text.strip()
-                            self.pslink_entry.setText(server_link)
-                        else:
-                            server_link = api_url
-                    except Exception:
-                        server_link = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
+                server_link = self.link_resolver.cached(self.detector.current_job_id)
+                if not server_link:
+                    # The invite link is looked up by the dispatcher, off this thread
+                    ropro_job_id = self.detector.current_job_id
         
         if server_link:
-            server_type = "Server Link"
-            if hasattr(self, 'server_mode_combo'):
-                server_type = f"{self.server_mode_combo.currentText()} Link"
             embed["fields"].append({
                 "name": server_type,
                 "value": f"[Click Here]({server_link})",
@@ -1049,54 +1163,60 @@ class RiftScopeApp(QMainWindow):
         if ping_content:
             payload["content"] = ping_content
 
-        files_to_send = None
-        response = None
-        try:
-            if file_path and os.path.exists(file_path):
-                files_to_send = {'file': (os.path.basename(file_path), open(file_path, 'rb'), 'image/png')}
-                response = requests.post(webhook_url, data={'payload_json': json.dumps(payload)}, files=files_to_send, timeout=15)
-            else:
-                response = requests.post(webhook_url, json=payload, timeout=10)
-            
-            response.raise_for_status() # This will raise an HTTPError if the HTTP request returned an unsuccessful status code
-            # If we reach here, the webhook was sent successfully (or at least the request was accepted)
-            # Proceed to delete the file if it was a currency screenshot
-            if file_path and (("currency_" in os.path.basename(file_path)) or ("merchant_" in os.path.basename(file_path))) and files_to_send:
-                try:
-                    # Ensure file is closed before attempting to delete
-                    if files_to_send and 'file' in files_to_send and files_to_send['file'] and hasattr(files_to_send['file'][1], 'close'):
-                        files_to_send['file'][1].close() 
-                        # Now that it's closed and (presumably) sent, delete it
-                        os.remove(file_path)
-                        self.update_status(f"Deleted screenshot: {file_path}")
-                        # Set files_to_send to None after closing and deleting to prevent re-closing in finally
-                        files_to_send = None 
-                except Exception as e_delete:
-                    self.update_status(f"Error deleting screenshot {file_path}: {e_delete}")
-                    print(f"Error deleting screenshot {file_path}: {e_delete}")
-
-        except requests.exceptions.RequestException as e: # More specific exception for requests
-            error_message = f"Webhook request error: {e} (URL: {webhook_url[:30]}...)"
-            print(error_message)
-            if worker_instance and hasattr(worker_instance, 'update_status_signal'):
-                worker_instance.update_status_signal.emit(error_message)
-            elif not worker_instance:
-                self.update_status(error_message)
-        except Exception as e: # General fallback
-            error_message = f"Webhook error (general): {e} (URL: {webhook_url[:30]}...)"
-            print(error_message)
-            if worker_instance and hasattr(worker_instance, 'update_status_signal'):
-                worker_instance.update_status_signal.emit(error_message)
-            elif not worker_instance:
-                self.update_status(error_message)
-        finally:
-            if files_to_send and 'file' in files_to_send and files_to_send['file'] and hasattr(files_to_send['file'][1], 'close'):
-                try:
-                    files_to_send['file'][1].close()
-                    # Optional: Clean up the screenshot if desired - MOVED specific deletion logic into try block after successful send
-                    # if "currency_" in file_path: os.remove(file_path) 
-                except Exception as e_close:
-                    print(f"Error closing screenshot file: {e_close}")
+        all_queued = True
+        for webhook_url in webhook_urls:
+            job = WebhookJob(webhook_url, copy.deepcopy(payload), attachment=attachment,
+                             ropro_job_id=ropro_job_id, server_link_name=server_type, priority=priority,
+                             detected_at=detected_at)
+            if not self.webhook_dispatcher.submit(job):
+                all_queued = False
+                error_message = f"Webhook queue is full, dropped notification: {title}"
+                print(error_message)
+                if worker_instance and hasattr(worker_instance, 'update_status_signal'):
+                    worker_instance.update_status_signal.emit(error_message)
+                else:
+                    self.update_status(error_message)
+        return all_queued
+
+    def on_webhook_finished(self, job):
+        """Called on the GUI thread when the dispatcher has finished with a webhook job"""
+        for message in job.status_messages:
+            self.update_status(message)
+        if job.error:
+            self.update_status(job.error)
+
+        if job.resolved_link:
+            self.on_server_link_resolved(job.ropro_job_id, job.resolved_link)
+
+    def on_server_link_resolved(self, job_id, link):
+        """Show a freshly resolved invite link if it is for the server we're still in"""
+        if hasattr(self, 'detector') and job_id == self.detector.current_job_id:
+            self.on_server_changed(job_id, self.detector.current_place_id or "", link)
+
+    def on_server_changed(self, job_id, place_id, link):
+        """Slot for server_changed_signal. Only the latest update of a burst is applied, once the burst settles."""
+        self._pending_server_update = (job_id, place_id, link)
+        if not hasattr(self, '_server_update_timer'):
+            self._server_update_timer = QTimer(self)
+            self._server_update_timer.setSingleShot(True)
+            self._server_update_timer.setInterval(self.SERVER_UPDATE_COALESCE_MS)
+            self._server_update_timer.timeout.connect(self._apply_server_update)
+        if not self._server_update_timer.isActive():
+            self._server_update_timer.start()
+
+    def _apply_server_update(self):
+        update, self._pending_server_update = self._pending_server_update, None
+        if update is None:
+            return
+        job_id, place_id, link = update
+        if self.server_mode_combo.currentText() != "Public Server":
+            return
+        truncated_id = job_id[:8] + "..." if len(job_id) > 8 else job_id
+        server_text = f"Current Server: {truncated_id}"
+        if self.server_status.text() != server_text:
+            self.server_status.setText(server_text)
+        if link and self.pslink_entry.text() != link:
+            self.pslink_entry.setText(link)
     
     def start_macro(self):
         """Start the scanning process"""
@@ -1114,10 +1234,11 @@ class RiftScopeApp(QMainWindow):
         self.running = True
         
         # Configure detector with UI components
+        self.update_detector_settings()
         self.detector.monitor_thread = Worker(self.detector.monitor_log)
         self.monitor_thread = self.detector.monitor_thread
         self.monitor_thread.update_status_signal.connect(self.update_status)
-        self.monitor_thread.webhook_signal.connect(self.send_webhook) 
+        self.monitor_thread.webhook_signal.connect(self.send_worker_webhook)
         self.monitor_thread.finished_signal.connect(self.on_monitor_finished) 
         self.monitor_thread.start()
 
@@ -1203,7 +1324,7 @@ class RiftScopeApp(QMainWindow):
                 self.update_status("Attempting to start Currency Screenshot Worker...")
                 self.currency_worker = CurrencyScreenshotWorker(self)
                 self.currency_worker.update_status_signal.connect(self.update_status)
-                self.currency_worker.send_webhook_signal.connect(self.send_webhook) # Connect its webhook signal
+                self.currency_worker.send_webhook_signal.connect(self.send_screenshot_webhook) # Connect its webhook signal
                 self.currency_worker.start()
             else:
                 self.update_status("Currency Screenshot Worker already running or PIL not available.")
@@ -1225,6 +1346,7 @@ class RiftScopeApp(QMainWindow):
             
         was_running = self.running
         self.running = False 
+        self.detector.watcher.wake()  # Don't leave the monitor loop waiting for a log write
         
         if hasattr(self, 'collection_running'):
             self.collection_running = False 
@@ -1348,6 +1470,18 @@ class RiftScopeApp(QMainWindow):
             self.currency_worker.wait(1000) # Shorter wait on exit
             self.currency_worker = None
 
+        if hasattr(self, 'screenshot_encoder'):
+            self.screenshot_encoder.shutdown()
+
+        # Give queued notifications (e.g. "RiftScope Stopped") a moment to go out
+        if hasattr(self, 'webhook_dispatcher'):
+            self.webhook_dispatcher.stop(timeout=2.0)
+            self.webhook_dispatcher.outbox.close()
+            try:
+                self.webhook_dispatcher.metrics.dump()
+            except OSError as e:
+                print(f"Error writing webhook stats: {e}")
+
         # Save configuration before exiting
         if hasattr(self, 'config') and self.config:
             self.update_status("Saving configuration before exiting...")
@@ -1415,17 +1549,11 @@ class RiftScopeApp(QMainWindow):
                 job_id = self.detector.current_job_id
                 truncated_id = job_id[:8] + "..." if len(job_id) > 8 else job_id
                 self.server_status.setText(f"Current Server: {truncated_id}")
-                self.update_status("Fetching shortened server link...")
-                api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-                self.pslink_entry.setText(api_url)
-                self._fetch_and_display_url(job_id)
-                try:
-                    if hasattr(self, '_fetch_short_link_worker') and self._fetch_short_link_worker and self._fetch_short_link_worker.isRunning():
-                        self._fetch_short_link_worker.wait(100)  
-                    self._fetch_short_link_worker = Worker(self._fetch_short_link, job_id)
-                    self._fetch_short_link_worker.start()
-                except Exception as e:
-                    self.update_status(f"Error starting link fetch worker: {str(e)}")
+                cached_link = self.link_resolver.cached(job_id)
+                self.pslink_entry.setText(cached_link or invite_api_url(job_id))
+                if not cached_link:
+                    self.update_status("Fetching shortened server link...")
+                    self.link_resolver.prefetch(job_id, callback=self.server_link_resolved_signal.emit)
                 self.update_status(f"Current Public Server: JobID={job_id}")
             else:
                 self.server_status.setText("No server detected yet")
@@ -1434,38 +1562,6 @@ class RiftScopeApp(QMainWindow):
         if hasattr(self, 'config'):
             self.config.save()
             
-    def _fetch_and_display_url(self, job_id):
-        """Directly fetch and display the URL - sync version for immediate feedback"""
-        try:
-            api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-            self.pslink_entry.setText(api_url)
-            
-            response = requests.get(api_url, timeout=10)
-            if response.status_code == 200 and response.text.strip().startswith("http"):
-                short_url = response.text.strip()
-                self.pslink_entry.setText(short_url)
-                self.update_status(f"✅ Got RoPro URL from API: {short_url}")
-            else:
-                self.update_status(f"API returned status {response.status_code}: {response.text[:100]}")
-        except Exception as e:
-            self.update_status(f"Error fetching RoPro URL: {str(e)}")
-            
-    def _fetch_short_link(self, job_id):
-        """Fetch the shortened ro.pro link from the RoPro API - used by the background worker"""
-        try:
-            api_url = f"https://api.ropro.io/createInvite.php?universeid=6504986360&serverid={job_id}"
-            self.pslink_entry.setText(api_url)
-            
-            response = requests.get(api_url, timeout=10)
-            if response.status_code == 200 and response.text.strip().startswith("http"):
-                short_url = response.text.strip()
-                self.pslink_entry.setText(short_url)
-                self.update_status(f"✅ Worker: Got RoPro URL from API: {short_url}")
-            else:
-                self.update_status(f"Worker: API returned status {response.status_code}")
-        except Exception as e:
-            self.update_status(f"Error in worker URL fetch: {str(e)}")
-
     def update_path_selector(self):
         """Update the path selector dropdown with available paths"""
         if hasattr(self, 'automation_type_selector_combo') and hasattr(self.collection_manager, 'available_paths'):
@@ -5,10 +5,16 @@
 import os
 import sys
 import json
+import mmap
 import time
+import struct
+import hashlib
+import calendar
 import random
 import platform
+import threading
 import subprocess
+from array import array
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -103,27 +109,378 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+def dir_mtime(path):
+    """Return a directory's mtime in nanoseconds, or None if it can't be read."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def scan_latest_file(directory):
+    """Return (path, mtime) of the newest file in directory using a single scandir pass."""
+    latest_path = None
+    latest_mtime = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            if latest_path is None or mtime > latest_mtime:
+                latest_path = entry.path
+                latest_mtime = mtime
+    return latest_path, latest_mtime
+
+class LogDirCache:
+    """Remembers the newest file in each log directory.
+
+    Creating, deleting or renaming a file updates the directory's own mtime, so
+    the directory is only rescanned when that changes (or after invalidate()).
+    Otherwise the cached newest file is returned after a single stat.
+    """
+
+    def __init__(self):
+        self._entries = {}  # directory -> (dir mtime_ns, latest path)
+
+    def invalidate(self, directory=None):
+        """Force a rescan of one directory, or of all of them."""
+        if directory is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(directory, None)
+
+    def latest(self, directory):
+        """Return (path, mtime) of the newest file in directory, or (None, 0)."""
+        current_mtime = dir_mtime(directory)
+        if current_mtime is None:
+            self._entries.pop(directory, None)
+            return None, 0
+
+        cached = self._entries.get(directory)
+        if cached and cached[0] == current_mtime:
+            if cached[1] is None:
+                return None, 0
+            try:
+                return cached[1], os.stat(cached[1]).st_mtime
+            except OSError:
+                pass  # Cached file vanished without a visible directory change; rescan
+
+        latest_path, latest_mtime = scan_latest_file(directory)
+        self._entries[directory] = (current_mtime, latest_path)
+        return latest_path, latest_mtime
+
+def write_file_atomic(path, data):
+    """Write bytes to path via a temporary file, so readers never see a half-written file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class BackgroundFileWriter:
+    """Write small state files atomically on a background thread.
+
+    submit() only records the latest contents for a path and returns at once; a
+    daemon thread writes them out, so a burst of updates costs one write per file.
+    """
+
+    def __init__(self):
+        self._pending = {}  # path -> bytes still to be written
+        self._writing = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, path, data):
+        """Queue data to be written to path, replacing anything queued for it earlier."""
+        with self._cond:
+            self._pending[path] = data
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="RiftScopeFileWriter", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Block until everything submitted so far is on disk. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            for path, data in batch.items():
+                try:
+                    write_file_atomic(path, data)
+                except OSError as e:
+                    print(f"Error writing {path}: {e}")
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+class DedupCache:
+    """Fixed-capacity set of 64-bit keys that forgets the oldest key first.
+
+    Keys live in a ring buffer (array of unsigned 64-bit ints) for insertion-ordered
+    eviction, with a set alongside for O(1) membership. The contents can be saved
+    to and loaded from disk so deduplication survives restarts.
+    """
+
+    _MAGIC = b"RSDC"
+    _HEADER = struct.Struct("<4sII")  # magic, capacity, count
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._ring = array("Q", bytes(8 * capacity))
+        self._keys = set()
+        self._head = 0  # Next slot to write (the oldest key once full)
+        self._count = 0
+
+    @staticmethod
+    def key_for(text):
+        """Stable 64-bit key for a line (unlike hash(), identical across runs)."""
+        digest = hashlib.blake2b(text.encode("utf-8", errors="ignore"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key):
+        """Add key, evicting the oldest key if full. Returns False if it was already present."""
+        if key in self._keys:
+            return False
+        if self._count == self.capacity:
+            self._keys.discard(self._ring[self._head])
+        else:
+            self._count += 1
+        self._ring[self._head] = key
+        self._keys.add(key)
+        self._head = (self._head + 1) % self.capacity
+        return True
+
+    def clear(self):
+        self._keys.clear()
+        self._head = 0
+        self._count = 0
+
+    def keys(self):
+        """Return the keys oldest-first."""
+        if self._count < self.capacity:
+            return self._ring[:self._count]
+        return self._ring[self._head:] + self._ring[:self._head]
+
+    def to_bytes(self):
+        """Serialize the keys in the format read by load()."""
+        keys = self.keys()
+        return self._HEADER.pack(self._MAGIC, self.capacity, len(keys)) + keys.tobytes()
+
+    def save(self, path):
+        """Write the keys to path atomically."""
+        write_file_atomic(path, self.to_bytes())
+
+    def load(self, path):
+        """Replace the contents with keys saved by save(). Returns False if nothing usable was found."""
+        try:
+            with open(path, "rb") as f:
+                magic, _capacity, count = self._HEADER.unpack(f.read(self._HEADER.size))
+                if magic != self._MAGIC:
+                    return False
+                keys = array("Q")
+                keys.frombytes(f.read(8 * count))
+        except (OSError, struct.error, ValueError):
+            return False
+        self.clear()
+        for key in keys[-self.capacity:]:
+            self.add(key)
+        return True
+
+class LogTailer:
+    """Incrementally read lines appended to a log file.
+
+    Keeps the file open and remembers the byte offset already consumed, so each
+    call only reads what was written since the previous one. A partial trailing
+    line is buffered until its newline arrives. If the file is truncated or
+    replaced (different inode/device), reading restarts from the beginning.
+    """
+
+    def __init__(self):
+        self.path = None
+        self._file = None
+        self._identity = None
+        self._read_pos = 0
+        self._partial = b""
+
+    @property
+    def offset(self):
+        """Byte offset just past the last complete line returned."""
+        return self._read_pos - len(self._partial)
+
+    def open(self, path, from_end=True):
+        """Start tailing path, either from its current end or from the beginning."""
+        self.close()
+        f = open(path, "rb")
+        st = os.fstat(f.fileno())
+        self._file = f
+        self.path = path
+        self._identity = (st.st_dev, st.st_ino)
+        self._read_pos = st.st_size if from_end else 0
+        self._partial = b""
+
+    @property
+    def identity(self):
+        """(st_dev, st_ino) of the file being tailed, or None."""
+        return self._identity
+
+    def resume(self, path, offset, identity=None, max_catch_up=None):
+        """Start tailing path from a previously saved offset.
+
+        If the file is no longer the one the offset belongs to (different identity,
+        or shorter than offset), tailing starts from the end instead. If more than
+        max_catch_up bytes were written since offset, only roughly the last
+        max_catch_up bytes are replayed, starting at a line boundary.
+
+        Returns the number of bytes that will be replayed, or None if the offset
+        could not be used.
+        """
+        self.open(path, from_end=True)
+        size = self._read_pos
+        if (identity is not None and tuple(identity) != self._identity) or not 0 <= offset <= size:
+            return None
+
+        start = offset
+        if max_catch_up is not None and size - offset > max_catch_up:
+            # Skip to the start of the first whole line inside the window
+            self._file.seek(size - max_catch_up)
+            self._file.readline()
+            start = min(self._file.tell(), size)
+        self._read_pos = start
+        return size - start
+
+    def close(self):
+        """Close the underlying file handle."""
+        if self._file:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._file = None
+        self.path = None
+        self._identity = None
+        self._read_pos = 0
+        self._partial = b""
+
+    def _reset_to_start(self, reopen=False):
+        if reopen:
+            path = self.path
+            self.open(path, from_end=False)
+        else:
+            self._read_pos = 0
+            self._partial = b""
+
+    def read_lines(self):
+        """Return the complete lines appended since the last call."""
+        if not self._file:
+            return []
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None  # Deleted while open; drain whatever the handle still sees
+
+        if st is not None:
+            if (st.st_dev, st.st_ino) != self._identity:
+                print(f"Log file replaced, reopening: {self.path}")
+                self._reset_to_start(reopen=True)
+            elif st.st_size < self._read_pos:
+                print(f"Log file truncated, restarting from beginning: {self.path}")
+                self._reset_to_start()
+            elif st.st_size == self._read_pos:
+                return []
+
+        self._file.seek(self._read_pos)
+        data = self._file.read()
+        if not data:
+            return []
+        self._read_pos += len(data)
+
+        chunks = (self._partial + data).split(b"\n")
+        self._partial = chunks.pop()
+        return [chunk.decode("utf-8", errors="ignore").rstrip("\r") for chunk in chunks]
+
+def iter_lines_reversed(path, chunk_size=64 * 1024):
+    """Yield the lines of a file newest-first, reading it backwards in fixed-size chunks.
+
+    Memory use is bounded by chunk_size plus the longest line, so callers that stop
+    early only pay for the part of the file they actually looked at.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        at_end = True
+        while position > 0:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            pieces = (f.read(read_size) + remainder).split(b"\n")
+            # The first piece may continue in the previous chunk, so hold it back
+            remainder = pieces[0]
+            for piece in reversed(pieces[1:]):
+                if at_end:
+                    at_end = False
+                    if not piece:
+                        continue  # Nothing after the final newline
+                yield piece.decode("utf-8", errors="ignore").rstrip("\r")
+        if remainder or not at_end:
+            yield remainder.decode("utf-8", errors="ignore").rstrip("\r")
+
 def read_last_n_lines(path, n=20):
-    """Read the last n lines from a file"""
+    """Read the last n lines from a file.
+
+    Memory-maps the file and walks back over newlines with rfind, then decodes only
+    the final slice, so the cost is proportional to the bytes in those n lines and
+    multibyte characters are never split.
+    """
+    if n <= 0:
+        return []
     try:
         with open(path, "rb") as f:
-            f.seek(0, os.SEEK_END)
-            file_size = f.tell()
-            buffer_size = 1024 * n 
-            buffer = bytearray()
-
-            while f.tell() > 0 and len(buffer.splitlines()) <= n + 1:
-                seek_pos = max(0, f.tell() - buffer_size)
-                f.seek(seek_pos, os.SEEK_SET)
-                chunk = f.read(min(buffer_size, file_size - seek_pos))
-                buffer = chunk + buffer
-                f.seek(seek_pos, os.SEEK_SET) 
-                if f.tell() == 0:
-                     break 
+            if os.fstat(f.fileno()).st_size == 0:
+                return []  # mmap can't map an empty file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                start = end
+                if mm[end - 1:end] == b"\n":
+                    start -= 1  # A trailing newline doesn't start another line
+
+                for _ in range(n):
+                    newline = mm.rfind(b"\n", 0, start)
+                    if newline < 0:
+                        start = 0
+                        break
+                    start = newline
+                else:
+                    start += 1  # Skip the newline that precedes the first wanted line
 
-            lines = buffer.decode('utf-8', errors='ignore').splitlines()
+                data = mm[start:end]
 
-        return lines[-n:] if len(lines) >= n else lines
+        lines = data.decode('utf-8', errors='ignore').splitlines()
+        return lines[-n:]
 
     except FileNotFoundError:
          print(f"Log file not found during read: {path}")
@@ -132,8 +489,60 @@ def read_last_n_lines(path, n=20):
         print(f"Error reading log: {e}")
         return []
 
+# Epoch seconds for each "YYYY-MM-DDTHH:MM" prefix seen recently
+_minute_epoch_cache = {}
+
+def parse_roblox_timestamp(line):
+    """Fast path for the fixed-width UTC prefix of Roblox log lines.
+
+    Roblox lines start with e.g. "2025-05-09T12:34:56.789Z,...". The fields are
+    sliced directly and the epoch of the current minute is cached, so the common
+    case costs a dict lookup and a few int() calls. Returns a float epoch, or None
+    (without raising) if the line doesn't have that prefix.
+    """
+    if (len(line) < 20 or line[4] != '-' or line[7] != '-' or line[10] != 'T'
+            or line[13] != ':' or line[16] != ':'):
+        return None
+
+    minute_key = line[:16]
+    minute_epoch = _minute_epoch_cache.get(minute_key)
+    if minute_epoch is None:
+        fields = (line[0:4], line[5:7], line[8:10], line[11:13], line[14:16])
+        if not all(field.isdigit() for field in fields):
+            return None
+        year, month, day, hour, minute = (int(field) for field in fields)
+        if not (1 <= month <= 12 and 1 <= day <= 31 and hour < 24 and minute < 60):
+            return None
+        if len(_minute_epoch_cache) > 1024:
+            _minute_epoch_cache.clear()
+        minute_epoch = calendar.timegm((year, month, day, hour, minute, 0, 0, 0, 0))
+        _minute_epoch_cache[minute_key] = minute_epoch
+
+    seconds = line[17:19]
+    if not seconds.isdigit():
+        return None
+    timestamp = float(minute_epoch + int(seconds))
+
+    pos = 19
+    if line[pos] == '.':
+        end = pos + 1
+        while end < len(line) and line[end].isdigit():
+            end += 1
+        if end > pos + 1:
+            timestamp += int(line[pos + 1:end]) / (10 ** (end - pos - 1))
+        pos = end
+
+    # Only UTC ("Z") timestamps are handled here; anything else uses the general parser
+    if pos >= len(line) or line[pos] != 'Z':
+        return None
+    return timestamp
+
 def extract_timestamp(line):
     """Extract timestamp from a log line"""
+    timestamp = parse_roblox_timestamp(line)
+    if timestamp is not None:
+        return timestamp
+
     parts = line.split(" ", 1)
     if len(parts) >= 2:
         try:
@@ -149,25 +558,72 @@ def extract_timestamp(line):
                     return None 
     return None
 
+ROBLOX_PROCESS_NAME = "RobloxPlayerBeta.exe"
+
+def psutil_process_table():
+    """Yield (pid, name) for every process psutil can see"""
+    for proc in psutil.process_iter(['pid', 'name']):
+        yield proc.info['pid'], proc.info['name'] or ""
+
+def find_roblox_pids(process_table):
+    """Return the set of Roblox player PIDs in process_table (a callable yielding (pid, name))"""
+    return {pid for pid, name in process_table() if ROBLOX_PROCESS_NAME in name}
+
 def is_roblox_running():
-    """Check if Roblox is currently running"""
+    """Check if Roblox is currently running (scans every process; see RobloxProcessTracker)"""
     if not HAS_PSUTIL:
         # If psutil is not available, assume Roblox is running
         print("Cannot check if Roblox is running: psutil module not available")
         return True
         
     try:
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                if 'RobloxPlayerBeta.exe' in proc.info['name']:
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue 
-        return False
+        return bool(find_roblox_pids(psutil_process_table))
     except Exception as e:
         print(f"Error checking Roblox process: {e}")
         return True  # Assume running on error
 
+class RobloxProcessTracker:
+    """Answers "is Roblox running?" without walking the whole process table each time.
+
+    The Roblox PIDs are found with one scan and afterwards only checked with
+    pid_exists. The process table is scanned again only when no Roblox PID is
+    tracked (so a relaunch is always noticed), when a tracked PID has gone, or
+    after invalidate() (called when a new log file appears). process_table and
+    pid_exists default to psutil and can be replaced, e.g. by a fake process table.
+    """
+
+    def __init__(self, process_table=None, pid_exists=None):
+        self._process_table = process_table or (psutil_process_table if HAS_PSUTIL else None)
+        self._pid_exists = pid_exists or (psutil.pid_exists if HAS_PSUTIL else None)
+        self.pids = set()
+        self.scans = 0
+        self._scan_needed = True
+
+    def invalidate(self):
+        """Rescan the process table on the next check"""
+        self._scan_needed = True
+
+    def is_running(self):
+        if self._process_table is None or self._pid_exists is None:
+            return True  # Without psutil, assume Roblox is running
+
+        try:
+            if self.pids and not self._scan_needed:
+                alive = {pid for pid in self.pids if self._pid_exists(pid)}
+                if alive == self.pids:
+                    return True
+                # A Roblox process exited; another may have replaced it
+                self._scan_needed = True
+            if self._scan_needed or not self.pids:
+                self.pids = find_roblox_pids(self._process_table)
+                self.scans += 1
+                self._scan_needed = False
+            return bool(self.pids)
+        except Exception as e:
+            print(f"Error checking Roblox process: {e}")
+            self._scan_needed = True
+            return True  # Assume running on error
+
 def apply_roblox_fastflags(update_status_callback=None):
     """Apply Roblox FastFlag settings for logging"""
     local_app_data = os.getenv('LOCALAPPDATA')
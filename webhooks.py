@@ -0,0 +1,848 @@
+#!/usr/bin/env python3
+# RiftScope - Webhook Delivery
+# GitHub: https://github.com/cresqnt-sys/RiftScope
+
+import os
+import json
+import time
+import heapq
+import queue
+import collections
+import random
+import sqlite3
+import threading
+import requests
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils import APP_DATA_DIR
+from ropro import RoProLinkResolver
+from screenshots import EncodedImage
+from metrics import DeliveryMetrics
+
+# Discord limits for a single webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Room left for the server link field that is added to an embed at send time
+SERVER_LINK_FIELD_RESERVE = 200
+
+# Notifications that haven't been delivered yet, kept across crashes and restarts
+OUTBOX_FILE = os.path.join(APP_DATA_DIR, "webhook_outbox.db")
+
+# Notification priorities, most important first
+PRIORITY_CRITICAL = "critical"  # Rifts, rare eggs and chests
+PRIORITY_HIGH = "high"  # Hatches
+PRIORITY_NORMAL = "normal"  # Status messages (started/stopped, server changes)
+PRIORITY_BULK = "bulk"  # Screenshot uploads
+PRIORITIES = (PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BULK)
+
+# Event types used to route notifications to webhooks
+EVENT_RIFT = "rift"  # Event rule matches (rifts, eggs, chests)
+EVENT_HATCH = "hatch"
+EVENT_SERVER = "server"  # Server changes
+EVENT_STATUS = "status"  # Started/stopped, Roblox closed, test scans
+EVENT_CURRENCY = "currency"  # Currency screenshots and heartbeats
+EVENT_MERCHANT = "merchant"  # Merchant purchases and merchant runs
+EVENT_TYPES = (EVENT_RIFT, EVENT_HATCH, EVENT_SERVER, EVENT_STATUS, EVENT_CURRENCY, EVENT_MERCHANT)
+
+
+def embed_size(embed):
+    """Characters an embed counts towards Discord's per-message total."""
+    size = len(embed.get("title", "")) + len(embed.get("description", ""))
+    size += len(embed.get("footer", {}).get("text", ""))
+    for field in embed.get("fields", []):
+        size += len(field.get("name", "")) + len(field.get("value", ""))
+    return size
+
+
+class WebhookRoute:
+    """One entry of the webhook_routes config: which events go to which webhooks."""
+
+    def __init__(self, name, webhooks, events=(), tags=()):
+        self.name = name
+        self.webhooks = list(webhooks)
+        self.events = set(events)
+        self.tags = set(tags)
+
+    @classmethod
+    def from_dict(cls, data, index=0):
+        """Build a route from its config form, raising ValueError if it is malformed."""
+        name = data.get("name") or f"route {index + 1}"
+        webhooks = data.get("webhooks")
+        if isinstance(webhooks, str):
+            webhooks = [webhooks]
+        if not webhooks or not all(isinstance(url, str) and url.strip() for url in webhooks):
+            raise ValueError(f"{name}: needs a list of 'webhooks'")
+        events = data.get("events", [])
+        unknown = [event for event in events if event not in EVENT_TYPES and event != "*"]
+        if unknown:
+            raise ValueError(f"{name}: unknown event type(s) {', '.join(unknown)}")
+        return cls(name, [url.strip() for url in webhooks], events=events, tags=data.get("tags", []))
+
+    def matches(self, event, tags):
+        if self.events and "*" not in self.events and event not in self.events:
+            return False
+        return not self.tags or not self.tags.isdisjoint(tags)
+
+
+class WebhookRouter:
+    """Picks the webhook URLs a notification is sent to.
+
+    A notification goes to every route whose events (and tags, if the route
+    lists any) match it. Notifications that match no route go to the main
+    webhook URL, so with no routes configured everything behaves as before.
+    """
+
+    def __init__(self, routes=()):
+        self.routes = []
+        self.errors = []
+        for index, data in enumerate(routes or ()):
+            try:
+                self.routes.append(WebhookRoute.from_dict(data, index))
+            except (ValueError, AttributeError, TypeError) as e:
+                self.errors.append(f"Skipping webhook route: {e}")
+
+    def webhook_count(self):
+        """Number of distinct webhook URLs across all routes"""
+        return len({url for route in self.routes for url in route.webhooks})
+
+    def destinations(self, event, tags=(), default_url=None):
+        """Webhook URLs for an event, without duplicates, in route order"""
+        urls = []
+        for route in self.routes:
+            if route.matches(event, tags):
+                urls.extend(url for url in route.webhooks if url not in urls)
+        if not urls and default_url:
+            urls.append(default_url)
+        return urls
+
+
+class RateLimitTracker:
+    """Tracks Discord's rate-limit bucket for each webhook URL.
+
+    Discord reports the requests left in the current window in X-RateLimit-Remaining
+    and when the window resets in X-RateLimit-Reset-After. reserve() claims a slot
+    before a request and says how long to wait if there is none, so several worker
+    threads sending to the same webhook pace themselves instead of hitting 429s.
+    """
+
+    # Responses whose reset times differ by less than this belong to the same window
+    WINDOW_TOLERANCE = 0.25
+    # While the bucket is unknown one request goes first; others wait this long for its headers at most
+    PROBE_TIMEOUT = 5.0
+    PROBE_POLL = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # url -> {"remaining", "reset_at", "blocked_until", "probe_until"} (monotonic times)
+
+    def reserve(self, url):
+        """Claim a request slot for url. Returns seconds to wait first; 0 means the slot is claimed."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(url)
+            if bucket["blocked_until"] > now:
+                return bucket["blocked_until"] - now
+            if bucket["remaining"] is None or bucket["reset_at"] <= now:
+                # New or finished window: send one request and let its response tell us the new one
+                bucket["remaining"] = None
+                if bucket["probe_until"] > now:
+                    return min(self.PROBE_POLL, bucket["probe_until"] - now)
+                bucket["probe_until"] = now + self.PROBE_TIMEOUT
+                return 0.0
+            if bucket["remaining"] <= 0:
+                return bucket["reset_at"] - now
+            bucket["remaining"] -= 1
+            return 0.0
+
+    def update(self, url, headers):
+        """Record the rate-limit headers of a response.
+
+        Responses can arrive out of order, and the count Discord reports doesn't
+        include our other requests still in flight, so within one window the
+        lowest count wins; responses from an earlier window are ignored.
+        """
+        with self._lock:
+            self._bucket(url)["probe_until"] = 0.0  # Any answer ends the probe, with or without headers
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_after = float(headers["X-RateLimit-Reset-After"])
+        except (KeyError, TypeError, ValueError):
+            return
+        now = time.monotonic()
+        reset_at = now + reset_after
+        with self._lock:
+            bucket = self._bucket(url)
+            if bucket["remaining"] is not None and bucket["reset_at"] > now:
+                if reset_at < bucket["reset_at"] - self.WINDOW_TOLERANCE:
+                    return
+                if reset_at <= bucket["reset_at"] + self.WINDOW_TOLERANCE:
+                    remaining = min(remaining, bucket["remaining"])
+                    reset_at = bucket["reset_at"]
+            bucket["remaining"] = remaining
+            bucket["reset_at"] = reset_at
+
+    def block(self, url, retry_after):
+        """Hold every request to url for retry_after seconds (after a 429)."""
+        with self._lock:
+            bucket = self._bucket(url)
+            bucket["blocked_until"] = max(bucket["blocked_until"], time.monotonic() + retry_after)
+            bucket["remaining"] = 0
+
+    def _bucket(self, url):
+        return self._buckets.setdefault(url, {"remaining": None, "reset_at": 0.0, "blocked_until": 0.0,
+                                              "probe_until": 0.0})
+
+
+class LaneQueue:
+    """Bounded job queue with one FIFO lane per priority.
+
+    get() always hands out a job from the most important lane that has one,
+    subject to a per-lane concurrency limit. Non-critical lanes together never
+    occupy more than reserved_for_critical fewer workers than there are, so a
+    critical job always finds a free worker even while screenshots upload.
+    Critical jobs are accepted even when the queue is full.
+    """
+
+    def __init__(self, maxsize, num_workers, limits=None, reserved_for_critical=1):
+        self.maxsize = maxsize
+        self.limits = limits or {}  # priority -> max jobs of that lane in flight at once
+        self.max_non_critical = max(num_workers - reserved_for_critical, 1)
+        self._lanes = {priority: collections.deque() for priority in PRIORITIES}
+        self._active = dict.fromkeys(PRIORITIES, 0)
+        self._stops = 0
+        self._cond = threading.Condition()
+
+    def qsize(self):
+        with self._cond:
+            return sum(len(lane) for lane in self._lanes.values())
+
+    def put_nowait(self, job):
+        with self._cond:
+            if job.priority != PRIORITY_CRITICAL and sum(len(lane) for lane in self._lanes.values()) >= self.maxsize:
+                raise queue.Full
+            self._lanes[job.priority].append(job)
+            self._cond.notify_all()
+
+    def stop(self, count):
+        """Make count waiting get() calls return None once nothing they could run is left."""
+        with self._cond:
+            self._stops += count
+            self._cond.notify_all()
+
+    def get(self):
+        with self._cond:
+            while True:
+                job = self._next()
+                if job is not None:
+                    self._active[job.priority] += 1
+                    return job
+                if self._stops:
+                    self._stops -= 1
+                    return None
+                self._cond.wait()
+
+    def task_done(self, job):
+        with self._cond:
+            self._active[job.priority] -= 1
+            self._cond.notify_all()
+
+    def _next(self):
+        non_critical_active = sum(count for priority, count in self._active.items() if priority != PRIORITY_CRITICAL)
+        for priority in PRIORITIES:
+            lane = self._lanes[priority]
+            if not lane:
+                continue
+            limit = self.limits.get(priority)
+            if limit is not None and self._active[priority] >= limit:
+                continue
+            if priority != PRIORITY_CRITICAL and non_critical_active >= self.max_non_critical:
+                continue
+            return lane.popleft()
+        return None
+
+
+class WebhookJob:
+    """One Discord webhook message waiting to be delivered.
+
+    Everything that needs the UI (webhook URL, embed contents, server mode) is
+    captured when the job is created, so delivery never touches Qt widgets.
+    """
+
+    def __init__(self, webhook_url, payload, attachment=None, ropro_job_id=None, server_link_name="Server Link",
+                 urgent=None, priority=None, detected_at=None):
+        self.webhook_url = webhook_url
+        self.payload = payload
+        self.attachment = attachment  # EncodedImage uploaded with the message, if any
+        # Public server job id whose RoPro invite link still has to be looked up
+        self.ropro_job_id = ropro_job_id
+        self.server_link_name = server_link_name
+        if priority not in PRIORITIES:
+            priority = PRIORITY_BULK if attachment else PRIORITY_NORMAL
+        self.priority = priority
+        # Critical messages and ones that ping someone are sent straight away instead of being held for batching
+        if urgent is None:
+            urgent = priority == PRIORITY_CRITICAL or bool(payload.get("content"))
+        self.urgent = urgent
+        # Jobs whose embeds were merged into this one (see combine())
+        self.parts = [self]
+
+        # Delivery bookkeeping, persisted in the outbox
+        self.outbox_id = None
+        self.created = time.time()
+        self.detected_at = detected_at or self.created  # When the event was seen (log line timestamp)
+        self.attempts = 0
+        self.next_attempt = 0.0
+
+        # Filled in by the dispatcher
+        self.resolved_link = None
+        self.reset_attempt()
+
+    def reset_attempt(self):
+        """Clear the outcome of the last send attempt, before the job is sent again"""
+        self.success = False
+        self.retryable = False  # Failed in a way that may succeed later (network error, 5xx)
+        self.error = None
+        self.status_messages = []
+        self.status_code = None  # HTTP status of the last response, None if the request itself failed
+        self.rate_limit_retries = 0  # 429s waited out during this attempt
+        self.request_bytes = 0
+        self.started_at = None
+        self.completed_at = None
+
+    @property
+    def title(self):
+        embeds = self.payload.get("embeds") or [{}]
+        return embeds[0].get("title", "")
+
+    @property
+    def can_coalesce(self):
+        return not self.urgent and not self.attachment and len(self.payload.get("embeds", [])) == 1
+
+    def size(self):
+        size = sum(embed_size(embed) for embed in self.payload.get("embeds", []))
+        return size + (SERVER_LINK_FIELD_RESERVE if self.ropro_job_id else 0)
+
+    def to_row(self):
+        attachment = self.attachment
+        return (self.created, self.webhook_url, json.dumps(self.payload), self.ropro_job_id,
+                self.server_link_name, int(self.urgent), self.priority, self.attempts, self.next_attempt,
+                self.detected_at,
+                attachment.filename if attachment else None,
+                attachment.content_type if attachment else None,
+                sqlite3.Binary(attachment.data) if attachment else None)
+
+    @classmethod
+    def from_row(cls, row):
+        (outbox_id, created, webhook_url, payload, ropro_job_id, server_link_name, urgent, priority,
+         attempts, next_attempt, detected_at, attachment_name, attachment_type, attachment_data) = row
+        attachment = None
+        if attachment_data is not None:
+            attachment = EncodedImage(attachment_name, bytes(attachment_data), attachment_type)
+        job = cls(webhook_url, json.loads(payload), attachment=attachment, ropro_job_id=ropro_job_id,
+                  server_link_name=server_link_name, urgent=bool(urgent), priority=priority,
+                  detected_at=detected_at)
+        job.outbox_id = outbox_id
+        job.created = created
+        job.attempts = attempts
+        job.next_attempt = next_attempt
+        return job
+
+    @classmethod
+    def combine(cls, jobs):
+        """Merge coalescable jobs for the same webhook into one message with several embeds."""
+        if len(jobs) == 1:
+            return jobs[0]
+        payload = {"embeds": [job.payload["embeds"][0] for job in jobs]}
+        combined = cls(jobs[0].webhook_url, payload, urgent=False, priority=jobs[0].priority)
+        combined.parts = list(jobs)
+        return combined
+
+
+class WebhookOutbox:
+    """Durable store for webhook jobs between being submitted and being delivered.
+
+    Jobs are inserted before the first send attempt and deleted once Discord
+    accepts them, so anything still in the table after a crash or restart is sent
+    again. The SQLite database runs in WAL mode with synchronous=FULL, and
+    add_many() inserts a whole burst in one transaction (one fsync).
+    Screenshot attachments are stored alongside as blobs.
+    """
+
+    # Columns added after the first version of the table: name -> type
+    ADDED_COLUMNS = {"priority": "TEXT", "attachment_name": "TEXT", "attachment_type": "TEXT", "attachment": "BLOB",
+                     "detected_at": "REAL"}
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL, webhook_url TEXT, payload TEXT, "
+                "ropro_job_id TEXT, server_link_name TEXT, urgent INTEGER, attempts INTEGER, next_attempt REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            for name, column_type in self.ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {column_type}")
+            self._conn = conn
+        return self._conn
+
+    def add_many(self, jobs):
+        """Insert jobs in a single transaction and set their outbox_id. Returns False on error."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("BEGIN")
+                try:
+                    for job in jobs:
+                        cursor = conn.execute(
+                            "INSERT INTO outbox (created, webhook_url, payload, ropro_job_id, server_link_name, "
+                            "urgent, priority, attempts, next_attempt, detected_at, attachment_name, attachment_type, "
+                            "attachment) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            job.to_row())
+                        job.outbox_id = cursor.lastrowid
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    for job in jobs:
+                        job.outbox_id = None
+                    raise
+            except sqlite3.Error as e:
+                print(f"Error writing webhook outbox: {e}")
+                return False
+        return True
+
+    def ack(self, jobs):
+        """Delete delivered (or permanently failed) jobs."""
+        ids = [(job.outbox_id,) for job in jobs if job.outbox_id is not None]
+        if not ids:
+            return
+        with self._lock:
+            try:
+                self._connect().executemany("DELETE FROM outbox WHERE id = ?", ids)
+            except sqlite3.Error as e:
+                print(f"Error updating webhook outbox: {e}")
+
+    def reschedule(self, job):
+        """Record a failed attempt and when to try again."""
+        if job.outbox_id is None:
+            return
+        with self._lock:
+            try:
+                self._connect().execute("UPDATE outbox SET attempts = ?, next_attempt = ? WHERE id = ?",
+                                        (job.attempts, job.next_attempt, job.outbox_id))
+            except sqlite3.Error as e:
+                print(f"Error updating webhook outbox: {e}")
+
+    def pending(self):
+        """All undelivered jobs, oldest first."""
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, created, webhook_url, payload, ropro_job_id, server_link_name, urgent, priority, "
+                    "attempts, next_attempt, detected_at, attachment_name, attachment_type, attachment "
+                    "FROM outbox ORDER BY id").fetchall()
+            except sqlite3.Error as e:
+                print(f"Error reading webhook outbox: {e}")
+                return []
+        jobs = []
+        for row in rows:
+            try:
+                jobs.append(WebhookJob.from_row(row))
+            except (TypeError, ValueError) as e:
+                print(f"Skipping unreadable outbox entry {row[0]}: {e}")
+        return jobs
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class WebhookDispatcher(QObject):
+    """Delivers webhook jobs on a small pool of background threads.
+
+    submit() only puts the job on a bounded queue and returns immediately.
+    Jobs are taken from per-priority lanes (see LaneQueue), so a rift alert
+    goes out ahead of, and alongside, a slow screenshot upload.
+    Each worker thread keeps its own requests.Session so connections to Discord
+    are reused. When a job finishes, finished_signal is emitted with the job;
+    Qt delivers it on the thread that owns the dispatcher (the GUI thread).
+    """
+
+    finished_signal = pyqtSignal(object)
+    status_signal = pyqtSignal(str)
+
+    # Attempts per job when Discord keeps answering 429
+    MAX_RATE_LIMIT_RETRIES = 5
+    # Upper bound of the random delay added to retry_after, so retries don't arrive together
+    RETRY_JITTER = 0.25
+    # Warn in the log once the queue is this full
+    QUEUE_WARN_RATIO = 0.8
+    # Backoff between delivery attempts for network errors and 5xx responses
+    RETRY_BASE_DELAY = 2.0
+    RETRY_MAX_DELAY = 300.0
+    # Longest a non-urgent message waits for an in-flight RoPro lookup; urgent ones never wait
+    LINK_WAIT = 3.0
+    # Undelivered notifications older than this are given up on
+    MAX_DELIVERY_AGE = 24 * 60 * 60
+    # How long the outbox writer waits for more jobs so a burst is committed together
+    GROUP_COMMIT_WINDOW = 0.01
+    # Most jobs of each lane in flight at once (critical is unlimited)
+    LANE_LIMITS = {PRIORITY_HIGH: 2, PRIORITY_NORMAL: 2, PRIORITY_BULK: 1}
+
+    def __init__(self, num_workers=4, max_queue_size=100, coalesce_window=0.25, outbox=None, link_resolver=None,
+                 metrics=None, parent=None):
+        super().__init__(parent)
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.outbox = outbox
+        self.link_resolver = link_resolver or RoProLinkResolver()
+        self.rate_limits = RateLimitTracker()
+        self.metrics = metrics or DeliveryMetrics()
+        self._queue = LaneQueue(max_queue_size, num_workers, limits=self.LANE_LIMITS)
+        self._saturated = False
+
+        # Unbounded so critical jobs always get in; submit() applies max_queue_size to the other lanes
+        self._persist_queue = queue.Queue()
+        self._persist_thread = None
+        self._retries = []  # heap of (due time, seq, job) waiting for their next attempt
+        self._retry_cond = threading.Condition()
+        self._retry_seq = 0
+        self._retry_thread = None
+
+        # Seconds non-urgent embeds are held so a burst goes out as one message; 0 disables
+        self.coalesce_window = coalesce_window
+        self._held = {}  # (webhook url, priority) -> (deadline, [jobs]) waiting to be combined
+        self._held_cond = threading.Condition()
+        self._coalesce_thread = None
+
+        self._threads = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads if they aren't running yet."""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.num_workers:
+                thread = threading.Thread(target=self._run, name=f"RiftScopeWebhook-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job):
+        """Queue a job for delivery. Returns False if the queue is full and the job was dropped.
+
+        With an outbox, the job is written to disk first (together with any other
+        jobs submitted at the same moment) and only then handed on for sending.
+        """
+        self.start()
+        self.metrics.record_queued()
+        if self.outbox is None:
+            accepted = self._accept(job)
+            if not accepted:
+                self.metrics.record_dropped()
+            return accepted
+        # Like the lanes, a backlog (e.g. a slow disk) drops other jobs but never critical ones
+        if job.priority != PRIORITY_CRITICAL and self._persist_queue.qsize() >= self.max_queue_size:
+            self.metrics.record_dropped()
+            return False
+        self._persist_queue.put_nowait(job)
+        if self._persist_thread is None or not self._persist_thread.is_alive():
+            self._persist_thread = threading.Thread(target=self._run_persister, name="RiftScopeWebhookOutbox", daemon=True)
+            self._persist_thread.start()
+        return True
+
+    def recover(self):
+        """Schedule every job left in the outbox by a previous run. Returns how many were found."""
+        if self.outbox is None:
+            return 0
+        self.start()
+        jobs = self.outbox.pending()
+        for job in jobs:
+            self._schedule_retry(job, job.next_attempt)
+        return len(jobs)
+
+    def _run_persister(self):
+        while True:
+            batch = [self._persist_queue.get()]
+            # Collect the rest of the burst so it costs one commit
+            deadline = time.monotonic() + self.GROUP_COMMIT_WINDOW
+            while len(batch) < self.max_queue_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._persist_queue.get(timeout=remaining) if remaining > 0
+                                 else self._persist_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.outbox.add_many(batch)
+            for job in batch:
+                # submit() has already reported these as accepted, so a drop (queue full and the
+                # outbox write failed) must be counted and logged here
+                if not self._accept(job):
+                    self.metrics.record_dropped()
+                    self.status_signal.emit(f"Webhook queue is full, dropped notification: {job.title}")
+
+    def _accept(self, job):
+        """Send job now, or hold it briefly to be combined with others.
+
+        Non-urgent single-embed jobs are held for up to coalesce_window seconds and
+        sent together with others for the same webhook. Anything else is queued at
+        once, after any held jobs for its webhook so messages stay in order.
+        """
+        key = (job.webhook_url, job.priority)
+        if self.coalesce_window <= 0 or not job.can_coalesce:
+            self._flush_held(key)
+            return self._enqueue(job)
+
+        with self._held_cond:
+            deadline, held = self._held.get(key, (None, []))
+            if held and (len(held) >= MAX_EMBEDS_PER_MESSAGE or
+                         sum(j.size() for j in held) + job.size() > MAX_EMBED_CHARS_PER_MESSAGE):
+                self._enqueue(WebhookJob.combine(self._held.pop(key)[1]))
+                deadline, held = None, []
+            held.append(job)
+            self._held[key] = (deadline or time.monotonic() + self.coalesce_window, held)
+            self._start_coalescer()
+            self._held_cond.notify_all()
+        return True
+
+    def _flush_held(self, key=None):
+        """Queue the jobs held under key (or all of them) now, merged into as few messages as allowed"""
+        with self._held_cond:
+            keys = [key] if key is not None else list(self._held)
+            batches = [self._held.pop(k)[1] for k in keys if k in self._held]
+        for held in batches:
+            self._enqueue(WebhookJob.combine(held))
+
+    def _start_coalescer(self):
+        if self._coalesce_thread is None or not self._coalesce_thread.is_alive():
+            self._coalesce_thread = threading.Thread(target=self._run_coalescer, name="RiftScopeWebhookCoalescer", daemon=True)
+            self._coalesce_thread.start()
+
+    def _run_coalescer(self):
+        while True:
+            with self._held_cond:
+                while not self._held:
+                    self._held_cond.wait()
+                now = time.monotonic()
+                due = [key for key, (deadline, _) in self._held.items() if deadline <= now]
+                if not due:
+                    self._held_cond.wait(min(deadline for deadline, _ in self._held.values()) - now)
+                    continue
+                batches = [self._held.pop(key)[1] for key in due]
+            for held in batches:
+                self._enqueue(WebhookJob.combine(held))
+
+    def _enqueue(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            if self.outbox is not None and all(part.outbox_id is not None for part in job.parts):
+                # Still safe on disk; try again once the queue has had time to drain
+                for part in job.parts:
+                    self._schedule_retry(part, time.time() + self.RETRY_BASE_DELAY)
+                return True
+            if len(job.parts) > 1:
+                # Held jobs have already been accepted, so report the drop here
+                self.metrics.record_dropped(len(job.parts))
+                self.status_signal.emit(f"Webhook queue is full, dropped {len(job.parts)} notifications")
+            return False
+        if len(job.parts) > 1:
+            self.metrics.record_posts_saved(len(job.parts) - 1)
+        self._check_saturation()
+        return True
+
+    def _check_saturation(self):
+        """Log when the queue fills up (usually a rate-limited webhook) and when it drains again"""
+        pending = self._queue.qsize()
+        if not self._saturated and pending >= self.max_queue_size * self.QUEUE_WARN_RATIO:
+            self._saturated = True
+            self.status_signal.emit(f"⚠️ Webhook queue is backing up ({pending}/{self.max_queue_size} pending), Discord may be rate limiting")
+        elif self._saturated and pending <= self.max_queue_size // 4:
+            self._saturated = False
+            self.status_signal.emit(f"Webhook queue drained ({pending} pending)")
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=2.0):
+        """Ask the workers to exit once the jobs already queued are sent.
+
+        Jobs that don't make it out in time stay in the outbox for the next run.
+        """
+        self._flush_held()
+        with self._lock:
+            threads = list(self._threads)
+            self._threads = []
+        self._queue.stop(len(threads))
+        for thread in threads:
+            thread.join(timeout / max(len(threads), 1))
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _run(self):
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                try:
+                    self.deliver(job)
+                except Exception as e:
+                    job.error = f"Webhook error (general): {e} (URL: {job.webhook_url[:30]}...)"
+                    print(job.error)
+                finally:
+                    self._queue.task_done(job)
+                retrying = self._settle(job)
+                self.metrics.record_attempt(job, retrying)
+                self.finished_signal.emit(job)
+                self._check_saturation()
+        finally:
+            session = getattr(self._local, "session", None)
+            if session is not None:
+                session.close()
+
+    def _settle(self, job):
+        """Remove a finished job from the outbox, or schedule its next attempt. Returns True if it will be retried."""
+        if self.outbox is None:
+            return False
+        if job.success or not job.retryable:
+            self.outbox.ack(job.parts)
+            return False
+        now = time.time()
+        expired = []
+        for part in job.parts:
+            if now - part.created > self.MAX_DELIVERY_AGE:
+                expired.append(part)
+                continue
+            part.attempts += 1
+            delay = min(self.RETRY_BASE_DELAY * 2 ** (part.attempts - 1), self.RETRY_MAX_DELAY)
+            part.next_attempt = now + delay * random.uniform(0.8, 1.2)
+            self.outbox.reschedule(part)
+            self._schedule_retry(part, part.next_attempt)
+        if expired:
+            self.outbox.ack(expired)
+            job.status_messages.append(f"Giving up on {len(expired)} notification(s) undelivered for over 24 hours")
+        if len(expired) < len(job.parts):
+            job.status_messages.append(f"Webhook will be retried in {max(job.parts[0].next_attempt - now, 0):.0f}s")
+            return True
+        return False
+
+    def _schedule_retry(self, job, due):
+        """Hand job back to _accept() at epoch time due"""
+        with self._retry_cond:
+            self._retry_seq += 1
+            heapq.heappush(self._retries, (due, self._retry_seq, job))
+            if self._retry_thread is None or not self._retry_thread.is_alive():
+                self._retry_thread = threading.Thread(target=self._run_retries, name="RiftScopeWebhookRetry", daemon=True)
+                self._retry_thread.start()
+            self._retry_cond.notify_all()
+
+    def _run_retries(self):
+        while True:
+            with self._retry_cond:
+                while not self._retries:
+                    self._retry_cond.wait()
+                due, _, job = self._retries[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._retry_cond.wait(delay)
+                    continue
+                heapq.heappop(self._retries)
+            job.reset_attempt()
+            self._accept(job)
+
+    def deliver(self, job):
+        """Send one job synchronously on the calling thread."""
+        session = self._session()
+
+        # Work on a copy so a retried job doesn't get the server link field twice
+        payload = dict(job.payload)
+        payload["embeds"] = [dict(embed, fields=list(embed.get("fields", []))) for embed in job.payload.get("embeds", [])]
+        links = {}
+        for part, embed in zip(job.parts, payload["embeds"]):
+            if not part.ropro_job_id:
+                continue
+            if part.ropro_job_id not in links:
+                links[part.ropro_job_id] = self.link_resolver.resolve(
+                    part.ropro_job_id, timeout=0 if job.urgent else self.LINK_WAIT)
+            server_link, resolved = links[part.ropro_job_id]
+            if resolved:
+                job.ropro_job_id, job.resolved_link = part.ropro_job_id, server_link
+            # Keep the server link right after the Time field, as when it was known up front
+            embed["fields"].insert(1, {
+                "name": part.server_link_name,
+                "value": f"[Click Here]({server_link})",
+                "inline": False
+            })
+
+        job.request_bytes = len(json.dumps(payload)) + (job.attachment.size if job.attachment else 0)
+        job.started_at = time.time()
+        try:
+            for attempt in range(self.MAX_RATE_LIMIT_RETRIES):
+                self._wait_for_slot(job.webhook_url)
+                response = self._post(session, job.webhook_url, payload, job.attachment)
+                job.status_code = response.status_code
+                self.rate_limits.update(job.webhook_url, response.headers)
+                if response.status_code != 429:
+                    break
+                job.rate_limit_retries += 1
+                retry_after = self._retry_after(response)
+                self.rate_limits.block(job.webhook_url, retry_after)
+                print(f"Webhook rate limited, retrying in {retry_after:.2f}s ({job.title})")
+            response.raise_for_status()
+            job.success = True
+        except requests.exceptions.HTTPError as e:
+            # Retry server errors and persistent rate limiting; other 4xx won't get better
+            status = e.response.status_code if e.response is not None else 0
+            job.retryable = status >= 500 or status == 429
+            job.error = f"Webhook request error: {e} (URL: {job.webhook_url[:30]}...)"
+            print(job.error)
+        except requests.exceptions.RequestException as e:
+            job.retryable = True
+            job.error = f"Webhook request error: {e} (URL: {job.webhook_url[:30]}...)"
+            print(job.error)
+        finally:
+            job.completed_at = time.time()
+
+    def _wait_for_slot(self, url):
+        """Sleep until the webhook's rate-limit bucket has room for another request"""
+        while True:
+            delay = self.rate_limits.reserve(url)
+            if delay <= 0:
+                return
+            time.sleep(delay + random.uniform(0, self.RETRY_JITTER))
+
+    @staticmethod
+    def _post(session, webhook_url, payload, attachment=None):
+        if not attachment:
+            return session.post(webhook_url, json=payload, timeout=10)
+        # The encoded image is uploaded straight from memory
+        files_to_send = {'file': (attachment.filename, attachment.data, attachment.content_type)}
+        return session.post(webhook_url, data={'payload_json': json.dumps(payload)}, files=files_to_send, timeout=15)
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds Discord asked us to wait after a 429"""
+        try:
+            return max(float(response.json()["retry_after"]), 0.0)
+        except (ValueError, KeyError, TypeError):
+            pass
+        try:
+            return max(float(response.headers.get("Retry-After", 1.0)), 0.0)
+        except (TypeError, ValueError):
+            return 1.0